@@ -0,0 +1,201 @@
+"""
+Generator of synthetic projects for the benchmarks.
+
+Projects are made of packages nested `package_depth` levels deep, each
+module defining a few functions and importing functions of other modules.
+A fraction `hot_fan_in` of the modules also import and call `hot_func`,
+defined in the hot module `pkg.hot`, which is the symbol the scenarios
+move or whose arguments they reorder.
+
+The same spec and seed always generate the same project.
+"""
+import argparse
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+
+HOT_MODULE = "pkg.hot"
+HOT_SYMBOL = "hot_func"
+HOT_DESTINATION = "pkg.hot_destination"
+HOT_ARGS = ["a", "b", "c"]
+
+IMPORT_STYLES = ("from", "import", "alias", "all")
+
+
+@dataclass
+class ProjectSpec:
+    modules: int = 100
+    package_depth: int = 2
+    # Packages per level of nesting.
+    packages_per_level: int = 3
+    imports_per_module: int = 3
+    # Fraction of the modules importing the hot symbol.
+    hot_fan_in: float = 0.3
+    symbols_per_module: int = 5
+    # Number of statements in the body of each function.
+    symbol_size: int = 5
+    # Styles of the imports, picked at random for each import:
+    #   from: `from a.b import c`
+    #   import: `import a.b`, then `a.b.c`
+    #   alias: `from a.b import c as d` or `import a.b as d`
+    #   all: `from a.b import c`, re-exported in `__all__`
+    import_styles: tuple[str, ...] = IMPORT_STYLES
+    seed: int = 0
+
+
+@dataclass
+class GeneratedModule:
+    name: str
+    symbols: list[str] = field(default_factory=list)
+    imports: list[str] = field(default_factory=list)
+    calls: list[str] = field(default_factory=list)
+    exports: list[str] = field(default_factory=list)
+
+
+def _package_names(spec: ProjectSpec) -> list[str]:
+    packages = ["pkg"]
+    level = ["pkg"]
+    for _ in range(spec.package_depth):
+        level = [
+            f"{parent}.sub{k}"
+            for parent in level
+            for k in range(spec.packages_per_level)
+        ]
+        packages.extend(level)
+    return packages
+
+
+def _import(
+    rng: random.Random, style: str, module_name: str, symbol: str, alias: str
+) -> tuple[str, str]:
+    """
+    Import statement of `symbol` from `module_name`, and the expression
+    referencing the symbol once imported.
+    """
+    if style == "import":
+        return f"import {module_name}", f"{module_name}.{symbol}"
+    if style == "alias":
+        if rng.random() < 0.5:
+            return f"import {module_name} as {alias}", f"{alias}.{symbol}"
+        return f"from {module_name} import {symbol} as {alias}", alias
+    return f"from {module_name} import {symbol}", symbol
+
+
+def _function(name: str, args: list[str], size: int) -> list[str]:
+    lines = [f"def {name}({', '.join(args)}):"]
+    lines.append(f"    result = {args[0]}")
+    for k in range(max(size - 2, 0)):
+        lines.append(f"    result = result * {k + 2} + {args[-1]}")
+    lines.append("    return result")
+    return lines
+
+
+def generate_project(root: Path, spec: ProjectSpec) -> list[str]:
+    """
+    Writes the project in `root` and returns the names of its modules.
+    """
+    rng = random.Random(spec.seed)
+    packages = _package_names(spec)
+    modules = [
+        GeneratedModule(f"{rng.choice(packages)}.mod{k}")
+        for k in range(spec.modules)
+    ]
+    for k, module in enumerate(modules):
+        module.symbols = [
+            f"func_{k}_{j}" for j in range(spec.symbols_per_module)
+        ]
+
+    hot_importers = set(
+        rng.sample(range(len(modules)), int(len(modules) * spec.hot_fan_in))
+    )
+    for k, module in enumerate(modules):
+        targets = rng.sample(
+            [j for j in range(len(modules)) if j != k],
+            min(spec.imports_per_module, len(modules) - 1),
+        )
+        dependencies = [
+            (modules[j].name, rng.choice(modules[j].symbols), f"alias_{j}")
+            for j in targets
+        ]
+        if k in hot_importers:
+            dependencies.append((HOT_MODULE, HOT_SYMBOL, "hot_alias"))
+        for module_name, symbol, alias in dependencies:
+            style = rng.choice(spec.import_styles)
+            statement, reference = _import(
+                rng, style, module_name, symbol, alias
+            )
+            if statement not in module.imports:
+                module.imports.append(statement)
+            if style == "all" and reference not in module.exports:
+                module.exports.append(reference)
+            if symbol == HOT_SYMBOL:
+                module.calls.append(f"{reference}(1, 2, 3)")
+            else:
+                module.calls.append(f"{reference}(1, 2)")
+
+    for package in packages:
+        location = root / package.replace(".", "/") / "__init__.py"
+        location.parent.mkdir(parents=True, exist_ok=True)
+        location.touch()
+
+    hot_lines = _function(HOT_SYMBOL, HOT_ARGS, spec.symbol_size)
+    _write(root, HOT_MODULE, "\n".join(hot_lines) + "\n")
+    _write(root, HOT_DESTINATION, "")
+
+    for module in modules:
+        lines = sorted(module.imports)
+        if len(module.exports):
+            exported = ", ".join(f'"{name}"' for name in module.exports)
+            lines += ["", f"__all__ = [{exported}]"]
+        for k, symbol in enumerate(module.symbols):
+            lines += ["", ""] if len(lines) else []
+            lines += _function(symbol, ["x", "y"], spec.symbol_size)
+            # Calls are spread over the functions of the module.
+            for call in module.calls[k :: len(module.symbols)]:
+                lines.insert(-1, f"    result += {call}")
+        _write(root, module.name, "\n".join(lines) + "\n")
+
+    return [HOT_MODULE, HOT_DESTINATION] + [m.name for m in modules]
+
+
+def _write(root: Path, module_name: str, content: str) -> None:
+    location = root / (module_name.replace(".", "/") + ".py")
+    location.parent.mkdir(parents=True, exist_ok=True)
+    with open(location, "w") as f:
+        f.write(content)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--modules", type=int, default=100)
+    parser.add_argument("--package-depth", type=int, default=2)
+    parser.add_argument("--imports-per-module", type=int, default=3)
+    parser.add_argument("--hot-fan-in", type=float, default=0.3)
+    parser.add_argument("--symbols-per-module", type=int, default=5)
+    parser.add_argument("--symbol-size", type=int, default=5)
+    parser.add_argument(
+        "--import-styles",
+        default=",".join(IMPORT_STYLES),
+        help="Comma-separated subset of: " + ", ".join(IMPORT_STYLES),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = ProjectSpec(
+        modules=args.modules,
+        package_depth=args.package_depth,
+        imports_per_module=args.imports_per_module,
+        hot_fan_in=args.hot_fan_in,
+        symbols_per_module=args.symbols_per_module,
+        symbol_size=args.symbol_size,
+        import_styles=tuple(args.import_styles.split(",")),
+        seed=args.seed,
+    )
+    args.root.mkdir(parents=True, exist_ok=True)
+    names = generate_project(args.root, spec)
+    print(f"Generated {len(names)} modules in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Times `move` and `reorder_func_arg` on synthetic projects of several
+sizes, end to end and per phase:
+
+    python -m benchmarks.run --sizes 100,500,2000
+
+Each run works on a freshly generated project, with a new `Project` so
+that nothing is cached in memory. The time of each phase is the wall time
+given by the `timings` option of the refactorings:
+
+    discovery: finding the modules to rewrite
+    parse: reading and parsing modules
+    scopes: scope analysis
+    transform: rewriting the modules
+    format: isort and black
+    write: writing the files
+"""
+import argparse
+import json
+import shutil
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+from benchmarks.generate import (
+    HOT_ARGS,
+    HOT_DESTINATION,
+    HOT_MODULE,
+    HOT_SYMBOL,
+    IMPORT_STYLES,
+    ProjectSpec,
+    generate_project,
+)
+from pyro.project import Project
+from pyro.refactorings.move import move
+from pyro.refactorings.reorder_func_args import reorder_func_arg
+
+PHASES = ["discovery", "parse", "scopes", "transform", "format", "write"]
+
+
+def run_move(project: Project, jobs: int) -> dict[str, Any]:
+    return move(
+        project, HOT_MODULE, 1, 0, HOT_DESTINATION, jobs=jobs, timings=True
+    )
+
+
+def run_reorder(project: Project, jobs: int) -> dict[str, Any]:
+    new_order = list(range(len(HOT_ARGS)))[::-1]
+    return reorder_func_arg(
+        project, HOT_MODULE, HOT_SYMBOL, new_order, timings=True
+    )
+
+
+SCENARIOS: dict[str, Callable[[Project, int], dict[str, Any]]] = {
+    "move": run_move,
+    "reorder": run_reorder,
+}
+
+
+def run_scenario(
+    scenario: str,
+    spec: ProjectSpec,
+    jobs: int = 1,
+    cache: bool = False,
+) -> dict[str, float]:
+    """
+    Runs `scenario` once on a new project and returns the time of each
+    phase, and the total time.
+    """
+    root = Path(tempfile.mkdtemp(prefix="pyro_benchmark"))
+    try:
+        generate_project(root, spec)
+        cache_dir = root / ".pyro_cache" if cache else None
+        if cache:
+            # Warm the parse cache and the import graph, as a previous run
+            # would have.
+            warm_project = Project(root, cache_dir=cache_dir)
+            for _, _ in warm_project.walk_modules():
+                pass
+            warm_project.import_graph.refresh()
+
+        start = time.perf_counter()
+        project = Project(root, cache_dir=cache_dir)
+        outputs = SCENARIOS[scenario](project, jobs)
+        total = time.perf_counter() - start
+    finally:
+        shutil.rmtree(root)
+
+    times = {
+        name: phase["wall"]
+        for name, phase in outputs["timings"]["phases"].items()
+    }
+    times["total"] = total
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        default="100,500,2000",
+        help="Comma-separated numbers of modules.",
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma-separated subset of: " + ", ".join(SCENARIOS),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Start with a warm parse cache and import graph.",
+    )
+    parser.add_argument("--package-depth", type=int, default=2)
+    parser.add_argument("--imports-per-module", type=int, default=3)
+    parser.add_argument("--hot-fan-in", type=float, default=0.3)
+    parser.add_argument("--symbols-per-module", type=int, default=5)
+    parser.add_argument("--symbol-size", type=int, default=5)
+    parser.add_argument(
+        "--import-styles",
+        default=",".join(IMPORT_STYLES),
+        help="Comma-separated subset of: " + ", ".join(IMPORT_STYLES),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON."
+    )
+    args = parser.parse_args()
+
+    base_spec = ProjectSpec(
+        package_depth=args.package_depth,
+        imports_per_module=args.imports_per_module,
+        hot_fan_in=args.hot_fan_in,
+        symbols_per_module=args.symbols_per_module,
+        symbol_size=args.symbol_size,
+        import_styles=tuple(args.import_styles.split(",")),
+        seed=args.seed,
+    )
+    phases = PHASES
+
+    results: list[dict[str, Any]] = []
+    if not args.json:
+        header = ["scenario", "modules"] + phases + ["total"]
+        print(" ".join(f"{column:>10}" for column in header))
+    for size in [int(size) for size in args.sizes.split(",")]:
+        spec = replace(base_spec, modules=size)
+        for scenario in args.scenarios.split(","):
+            runs = [
+                run_scenario(scenario, spec, args.jobs, args.cache)
+                for _ in range(args.repeat)
+            ]
+            # Median of each phase over the runs, in seconds.
+            times = {
+                phase: statistics.median(run.get(phase, 0.0) for run in runs)
+                for phase in phases + ["total"]
+            }
+            results.append(
+                {"scenario": scenario, "modules": size, "times": times}
+            )
+            if not args.json:
+                row = [f"{scenario:>10}", f"{size:>10}"] + [
+                    f"{times[phase]:>10.3f}" for phase in phases + ["total"]
+                ]
+                print(" ".join(row), flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
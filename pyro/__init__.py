@@ -1,6 +1,28 @@
-from pyro import refactorings
-from pyro.module import Module
-from pyro.project import Project
-from pyro.version import __version__
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pyro import refactorings
+    from pyro.module import Module
+    from pyro.project import Project
+    from pyro.version import __version__
 
 __all__ = ["__version__", "refactorings", "Project", "Module"]
+
+# These pull in libcst, so they are only imported on first access to keep
+# the startup of the CLI fast.
+_LAZY_ATTRIBUTES = {
+    "__version__": "pyro.version",
+    "refactorings": None,
+    "Project": "pyro.project",
+    "Module": "pyro.module",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name = _LAZY_ATTRIBUTES[name]
+    if module_name is None:
+        return importlib.import_module(f"{__name__}.{name}")
+    return getattr(importlib.import_module(module_name), name)
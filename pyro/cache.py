@@ -0,0 +1,339 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pyro.version import get_version
+
+# libcst is imported when trees are actually cached, the CLI only needs the
+# defaults of this module.
+if TYPE_CHECKING:
+    import libcst as cst
+    from libcst.metadata import MetadataWrapper
+
+DEFAULT_CACHE_DIR = ".pyro_cache"
+DEFAULT_MAX_CACHE_SIZE = 512 * 1024 * 1024
+
+# Bump when the layout of the cache entries changes.
+CACHE_FORMAT = 1
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _libcst_version() -> str:
+    import importlib.metadata
+
+    try:
+        return importlib.metadata.version("libcst")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def cache_namespace() -> str:
+    """
+    Entries written by another version of pyro, libcst or python cannot
+    be trusted to unpickle to the same tree, so each combination gets its
+    own directory.
+    """
+    key = ":".join(
+        [
+            str(CACHE_FORMAT),
+            get_version(),
+            _libcst_version(),
+            sys.version,
+        ]
+    )
+    return "parse-" + hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def project_key(root: Path) -> str:
+    """
+    The cache directory may be shared by several projects.
+    """
+    return hashlib.sha256(str(root.resolve()).encode()).hexdigest()[:16]
+
+
+def manifest_name(root: Path) -> str:
+    return f"manifest-{project_key(root)}.json"
+
+
+def index_name(root: Path) -> str:
+    return f"index-{project_key(root)}.json"
+
+
+def journal_name(root: Path) -> str:
+    return f"journal-{project_key(root)}"
+
+
+def init_cache_dir(directory: Path) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    gitignore = directory / ".gitignore"
+    if not gitignore.exists():
+        with open(gitignore, "w") as f:
+            f.write("# Created by pyro automatically.\n*\n")
+
+
+def atomic_write_bytes(location: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(
+        dir=location.parent, prefix=f".{location.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, location)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed modules.
+
+    Entries are keyed by the path, size, mtime and content hash of the
+    source file. They are written with an atomic rename so that several
+    processes can share the same cache directory, and the least recently
+    used entries are evicted once the cache grows over `max_size` bytes.
+    """
+
+    def __init__(
+        self, directory: Path, max_size: int = DEFAULT_MAX_CACHE_SIZE
+    ):
+        self.root = directory
+        self.directory = directory / cache_namespace()
+        self.max_size = max_size
+        self._size: int | None = None
+
+    def _entry_path(self, location: Path, content: str) -> Path:
+        stat = location.stat()
+        key = hashlib.sha256(
+            ":".join(
+                [
+                    str(location.resolve()),
+                    str(stat.st_size),
+                    str(stat.st_mtime_ns),
+                    content_hash(content),
+                ]
+            ).encode()
+        ).hexdigest()
+        return self.directory / key[:2] / f"{key}.pickle"
+
+    def get(self, location: Path, content: str) -> "cst.Module | None":
+        import libcst as cst
+
+        try:
+            entry = self._entry_path(location, content)
+            with open(entry, "rb") as f:
+                tree = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if not isinstance(tree, cst.Module):
+            return None
+
+        try:
+            # The mtime of the entry tracks its last use for LRU eviction.
+            os.utime(entry)
+        except OSError:
+            pass
+        return tree
+
+    def put(self, location: Path, content: str, tree: "cst.Module") -> None:
+        try:
+            data = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            return
+
+        try:
+            entry = self._entry_path(location, content)
+            if self._size is None:
+                init_cache_dir(self.root)
+                self._size = self._compute_size()
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_bytes(entry, data)
+        except OSError:
+            return
+
+        self._size += len(data)
+        if self._size > self.max_size:
+            self.prune()
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries: list[tuple[Path, os.stat_result]] = []
+        if not self.directory.is_dir():
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(".pickle"):
+                    continue
+                try:
+                    entries.append((Path(entry.path), entry.stat()))
+                except FileNotFoundError:
+                    continue
+        return entries
+
+    def _compute_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def prune(self) -> None:
+        """
+        Evicts the least recently used entries until the cache is back
+        under 90% of its maximum size.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime_ns)
+        size = sum(stat.st_size for _, stat in entries)
+        target = int(self.max_size * 0.9)
+        for path, stat in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= stat.st_size
+        self._size = size
+
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Rough ratio between the memory used by a parsed tree and the size of its
+# source code.
+TREE_SIZE_FACTOR = 40
+# Same for the metadata (positions, parents, scopes...) of a tree.
+METADATA_SIZE_FACTOR = 60
+
+
+class ModuleCacheEntry:
+    def __init__(
+        self, key: tuple[int, int], tree: "cst.Module", source_size: int
+    ):
+        self.key = key
+        self.tree = tree
+        self.source_size = source_size
+        self.wrapper: "MetadataWrapper | None" = None
+        # Names listed in `__all__`.
+        self.exports: frozenset[str] | None = None
+
+    @property
+    def cost(self) -> int:
+        factor = TREE_SIZE_FACTOR
+        if self.wrapper is not None:
+            factor += METADATA_SIZE_FACTOR
+        return self.source_size * factor
+
+
+class ModuleCache:
+    """
+    In-memory LRU cache of parsed modules, and of the metadata resolved on
+    them.
+
+    Entries are invalidated when the mtime or size of the source file
+    changes. The memory used by an entry is estimated from the size of its
+    source, and least recently used entries are dropped once the estimated
+    total goes over `budget` bytes.
+    """
+
+    def __init__(
+        self,
+        budget: int = DEFAULT_MEMORY_BUDGET,
+        counters: Counter[str] | None = None,
+    ):
+        self.budget = budget
+        self.size = 0
+        self.counters = counters
+        self._entries: OrderedDict[str, ModuleCacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def get(self, name: str, stat: os.stat_result) -> "cst.Module | None":
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        if entry.key != (stat.st_mtime_ns, stat.st_size):
+            self.invalidate(name)
+            return None
+        self._entries.move_to_end(name)
+        return entry.tree
+
+    def put(self, name: str, stat: os.stat_result, tree: "cst.Module") -> None:
+        self.invalidate(name)
+        entry = ModuleCacheEntry(
+            (stat.st_mtime_ns, stat.st_size), tree, stat.st_size
+        )
+        if entry.cost > self.budget:
+            return
+        self._entries[name] = entry
+        self.size += entry.cost
+        self._evict()
+
+    def get_wrapper(
+        self, name: str, tree: "cst.Module"
+    ) -> "MetadataWrapper | None":
+        """
+        Metadata wrapper of `tree`, if it is the cached tree of `name`.
+        Cached trees are never mutated nor shared with another wrapper, so
+        they do not need to be copied before resolving metadata on them.
+        """
+        entry = self._entries.get(name)
+        if entry is None or entry.tree is not tree:
+            return None
+        if entry.wrapper is None:
+            self.size -= entry.cost
+            from libcst.metadata import MetadataWrapper
+
+            entry.wrapper = MetadataWrapper(tree, unsafe_skip_copy=True)
+            if self.counters is not None:
+                self.counters["metadataWrappers"] += 1
+            self.size += entry.cost
+            self._evict(keep=name)
+        return entry.wrapper
+
+    def get_exports(
+        self, name: str, tree: "cst.Module"
+    ) -> frozenset[str] | None:
+        entry = self._entries.get(name)
+        if entry is None or entry.tree is not tree:
+            return None
+        return entry.exports
+
+    def put_exports(
+        self, name: str, tree: "cst.Module", exports: frozenset[str]
+    ) -> None:
+        """
+        Caches the exports of `tree`, if it is the cached tree of `name`.
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry.tree is tree:
+            entry.exports = exports
+
+    def _evict(self, keep: str | None = None) -> None:
+        while self.size > self.budget and len(self._entries):
+            name, entry = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            self.invalidate(name)
+
+    def invalidate(self, name: str) -> None:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= entry.cost
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
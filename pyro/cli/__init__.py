@@ -1,6 +1,10 @@
 import click
 
+from pyro.cli.lsp import lsp_command
 from pyro.cli.move import move_command
+from pyro.cli.serve import serve_command
+from pyro.cli.split import split_command
+from pyro.cli.undo import undo_command
 
 __all__ = ["cli"]
 
@@ -11,3 +15,7 @@ def cli():
 
 
 cli.add_command(move_command)
+cli.add_command(split_command)
+cli.add_command(undo_command)
+cli.add_command(serve_command)
+cli.add_command(lsp_command)
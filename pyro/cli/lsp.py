@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import click
+
+from pyro.cli.utils import cache_options, get_cache_dir
+
+
+@click.command("lsp", help="Run the pyro language server on stdio")
+@click.argument(
+    "root_path",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=".",
+)
+@click.option(
+    "--watch/--no-watch",
+    default=True,
+    help="Watch the files of the project so that only the modules that "
+    "changed are analyzed again.",
+)
+@cache_options
+def lsp_command(
+    root_path: Path, watch: bool, cache_dir: Path | None, no_cache: bool
+) -> None:
+    from pyro.lsp import LanguageServer
+
+    cache_dir = get_cache_dir(root_path, cache_dir, no_cache)
+    server = LanguageServer(root_path, cache_dir=cache_dir, watch=watch)
+    server.serve(sys.stdin.buffer, sys.stdout.buffer)
@@ -1,51 +1,130 @@
-import json
-import traceback
 from pathlib import Path
+from typing import Any
 
 import click
 
-from pyro.project import Project
-from pyro.refactorings.move import move
+from pyro.cli.utils import (
+    cache_options,
+    daemon_options,
+    forward_or_run,
+    get_cache_dir,
+    get_daemon_socket,
+    get_project,
+)
+
 
+def parse_target(
+    ctx: click.Context, param: click.Parameter, values: tuple[str, ...]
+) -> tuple[str, str | tuple[int, int], str]:
+    """
+    Module, symbol and destination of `MODULE_START:SYMBOL MODULE_END` or
+    `MODULE_START LINENO COLNO MODULE_END`. The symbol is given by its name
+    or by the location of its definition.
+    """
+    if len(values) == 2:
+        module_start, _, symbol = values[0].partition(":")
+        if module_start and symbol:
+            return module_start, symbol, values[1]
+    elif len(values) == 4:
+        module_start, lineno, colno, module_end = values
+        try:
+            return module_start, (int(lineno), int(colno)), module_end
+        except ValueError:
+            pass
+    raise click.BadParameter(
+        "expected MODULE_START:SYMBOL MODULE_END or "
+        "MODULE_START LINENO COLNO MODULE_END."
+    )
 
-@click.command("move", help="Move a symbol to another module")
+
+@click.command(
+    "move",
+    help="Move a symbol to another module. The symbol is given either by "
+    "its name, as in `pyro move . pkg.mod:Symbol pkg.dest`, or by the "
+    "LINENO COLNO of its definition.",
+)
 @click.argument(
     "root_path",
     type=click.Path(exists=True, path_type=Path),
     required=True,
 )
 @click.argument(
-    "module_start",
-    type=str,
+    "target",
+    nargs=-1,
     required=True,
+    callback=parse_target,
+    metavar="MODULE_START[:SYMBOL] [LINENO COLNO] MODULE_END",
 )
-@click.argument(
-    "lineno",
-    type=int,
-    required=True,
+@cache_options
+@daemon_options
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Number of processes rewriting imports (0 to use all CPUs).",
 )
-@click.argument(
-    "colno",
-    type=int,
-    required=True,
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Do not write anything, return the diff of each file instead.",
+)
+@click.option(
+    "--timings",
+    is_flag=True,
+    default=False,
+    help="Add the time spent in each phase to the output.",
+)
+@click.option(
+    "--clean-all-imports",
+    is_flag=True,
+    default=False,
+    help="Remove all unused imports of the edited modules, not only the "
+    "ones made unused by the refactoring.",
 )
-@click.argument("module_end", type=str, required=True)
 def move_command(
     root_path: Path,
-    module_start: str,
-    lineno: int,
-    colno: int,
-    module_end: str,
+    target: tuple[str, str | tuple[int, int], str],
+    cache_dir: Path | None,
+    no_cache: bool,
+    jobs: int,
+    dry_run: bool,
+    timings: bool,
+    clean_all_imports: bool,
+    no_daemon: bool,
 ) -> None:
-    try:
-        project = Project(root_path)
-        outputs = move(project, module_start, lineno, colno, module_end)
-    except Exception as e:
-        err_trace = traceback.format_exc()
-        print(
-            json.dumps(
-                {"success": False, "errorMsg": str(e), "trace": err_trace}
+    module_start, symbol, module_end = target
+    options: dict[str, Any] = {
+        "jobs": jobs,
+        "dry_run": dry_run,
+        "timings": timings,
+        "clean_all_imports": clean_all_imports,
+    }
+
+    def run() -> dict[str, Any]:
+        from pyro.refactorings.move import move, move_symbol
+
+        project = get_project(root_path, cache_dir, no_cache)
+        if isinstance(symbol, str):
+            return move_symbol(
+                project, module_start, symbol, module_end, **options
             )
+        return move(project, module_start, *symbol, module_end, **options)
+
+    socket_path = None
+    if not no_daemon:
+        socket_path = get_daemon_socket(
+            get_cache_dir(root_path, cache_dir, no_cache)
         )
-        return
-    print(json.dumps(outputs))
+    args = {
+        "root": str(root_path.resolve()),
+        "module_start": module_start,
+        "module_end": module_end,
+        **options,
+    }
+    if isinstance(symbol, str):
+        args["symbol"] = symbol
+    else:
+        args["lineno"], args["colno"] = symbol
+    forward_or_run(socket_path, "move", args, run)
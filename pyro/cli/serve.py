@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import click
+
+from pyro.cli.utils import cache_options, get_cache_dir, get_daemon_socket
+
+
+@click.command("serve", help="Run pyro as a daemon keeping projects warm")
+@click.argument(
+    "root_path",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    required=True,
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Unix socket to listen on. Defaults to daemon.sock in the cache "
+    "directory, where the other commands look for a running daemon.",
+)
+@click.option(
+    "--stdio",
+    is_flag=True,
+    default=False,
+    help="Read requests from stdin and write responses to stdout.",
+)
+@click.option(
+    "--watch/--no-watch",
+    default=True,
+    help="Watch the files of the project so that only the modules that "
+    "changed are analyzed again.",
+)
+@cache_options
+def serve_command(
+    root_path: Path,
+    socket_path: Path | None,
+    stdio: bool,
+    watch: bool,
+    cache_dir: Path | None,
+    no_cache: bool,
+) -> None:
+    from pyro.server import Server
+
+    cache_dir = get_cache_dir(root_path, cache_dir, no_cache)
+    if not stdio:
+        if socket_path is None:
+            socket_path = get_daemon_socket(cache_dir)
+        if socket_path is None:
+            raise click.UsageError("--no-cache requires --socket or --stdio.")
+
+    server = Server(root_path, cache_dir=cache_dir, watch=watch)
+    try:
+        if stdio:
+            server.serve_stream(sys.stdin, sys.stdout)
+        else:
+            assert socket_path is not None
+            server.serve_socket(socket_path)
+    finally:
+        server.close()
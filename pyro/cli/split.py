@@ -0,0 +1,122 @@
+import re
+from pathlib import Path
+from typing import Any
+
+import click
+
+from pyro.cli.utils import (
+    cache_options,
+    daemon_options,
+    forward_or_run,
+    get_cache_dir,
+    get_daemon_socket,
+    get_project,
+)
+
+_LOCATION = re.compile(r"(\d+):(\d+)")
+
+
+def parse_moves(
+    ctx: click.Context, param: click.Parameter, values: tuple[str, ...]
+) -> list[tuple[str | tuple[int, int], str]]:
+    moves: list[tuple[str | tuple[int, int], str]] = []
+    for value in values:
+        symbol, _, module_end = value.partition("=")
+        if not symbol or not module_end:
+            raise click.BadParameter(
+                f"{value!r} is not of the form SYMBOL=MODULE_END."
+            )
+        location = _LOCATION.fullmatch(symbol)
+        if location is not None:
+            moves.append(
+                ((int(location.group(1)), int(location.group(2))), module_end)
+            )
+        else:
+            moves.append((symbol, module_end))
+    return moves
+
+
+@click.command(
+    "split",
+    help="Move several symbols out of a module at once. Each MOVE is of "
+    "the form SYMBOL=MODULE_END, where SYMBOL is the name of the symbol or "
+    "the LINENO:COLNO of its definition.",
+)
+@click.argument(
+    "root_path",
+    type=click.Path(exists=True, path_type=Path),
+    required=True,
+)
+@click.argument("module_start", type=str, required=True)
+@click.argument(
+    "moves", nargs=-1, required=True, callback=parse_moves, metavar="MOVE..."
+)
+@cache_options
+@daemon_options
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Number of processes rewriting imports (0 to use all CPUs).",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Do not write anything, return the diff of each file instead.",
+)
+@click.option(
+    "--timings",
+    is_flag=True,
+    default=False,
+    help="Add the time spent in each phase to the output.",
+)
+@click.option(
+    "--clean-all-imports",
+    is_flag=True,
+    default=False,
+    help="Remove all unused imports of the edited modules, not only the "
+    "ones made unused by the refactoring.",
+)
+def split_command(
+    root_path: Path,
+    module_start: str,
+    moves: list[tuple[str | tuple[int, int], str]],
+    cache_dir: Path | None,
+    no_cache: bool,
+    jobs: int,
+    dry_run: bool,
+    timings: bool,
+    clean_all_imports: bool,
+    no_daemon: bool,
+) -> None:
+    def run() -> dict[str, Any]:
+        from pyro.refactorings.split import split_module
+
+        project = get_project(root_path, cache_dir, no_cache)
+        return split_module(
+            project,
+            module_start,
+            moves,
+            jobs=jobs,
+            dry_run=dry_run,
+            timings=timings,
+            clean_all_imports=clean_all_imports,
+        )
+
+    socket_path = None
+    if not no_daemon:
+        socket_path = get_daemon_socket(
+            get_cache_dir(root_path, cache_dir, no_cache)
+        )
+    args = {
+        "root": str(root_path.resolve()),
+        "module_start": module_start,
+        "moves": moves,
+        "jobs": jobs,
+        "dry_run": dry_run,
+        "timings": timings,
+        "clean_all_imports": clean_all_imports,
+    }
+    forward_or_run(socket_path, "split", args, run)
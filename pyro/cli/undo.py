@@ -0,0 +1,50 @@
+from pathlib import Path
+from typing import Any
+
+import click
+
+from pyro.cli.utils import (
+    cache_options,
+    daemon_options,
+    forward_or_run,
+    get_cache_dir,
+    get_daemon_socket,
+    get_project,
+)
+
+
+@click.command("undo", help="Undo the last refactorings")
+@click.argument(
+    "root_path",
+    type=click.Path(exists=True, path_type=Path),
+    required=True,
+)
+@click.option(
+    "-n",
+    "--steps",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of refactorings to undo.",
+)
+@cache_options
+@daemon_options
+def undo_command(
+    root_path: Path,
+    steps: int,
+    cache_dir: Path | None,
+    no_cache: bool,
+    no_daemon: bool,
+) -> None:
+    def run() -> dict[str, Any]:
+        from pyro.refactorings.undo import undo
+
+        project = get_project(root_path, cache_dir, no_cache)
+        return undo(project, steps)
+
+    socket_path = None
+    if not no_daemon:
+        socket_path = get_daemon_socket(
+            get_cache_dir(root_path, cache_dir, no_cache)
+        )
+    args = {"root": str(root_path.resolve()), "steps": steps}
+    forward_or_run(socket_path, "undo", args, run)
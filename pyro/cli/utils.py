@@ -0,0 +1,100 @@
+import json
+import traceback
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import click
+
+from pyro import client
+from pyro.cache import DEFAULT_CACHE_DIR
+
+if TYPE_CHECKING:
+    from pyro.project import Project
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def cache_options(f: F) -> F:
+    f = click.option(
+        "--no-cache",
+        is_flag=True,
+        default=False,
+        help="Do not use the cache directory (parse cache and undo journal).",
+    )(f)
+    f = click.option(
+        "--cache-dir",
+        type=click.Path(file_okay=False, path_type=Path),
+        default=None,
+        help=f"Cache location. Defaults to ROOT_PATH/{DEFAULT_CACHE_DIR}.",
+    )(f)
+    return f
+
+
+def daemon_options(f: F) -> F:
+    return click.option(
+        "--no-daemon",
+        is_flag=True,
+        default=False,
+        help="Run in this process even if a pyro daemon is running.",
+    )(f)
+
+
+def get_cache_dir(
+    root_path: Path, cache_dir: Path | None, no_cache: bool
+) -> Path | None:
+    if no_cache:
+        return None
+    if cache_dir is None:
+        return root_path / DEFAULT_CACHE_DIR
+    return cache_dir
+
+
+def get_project(
+    root_path: Path, cache_dir: Path | None, no_cache: bool
+) -> "Project":
+    # Commands import the refactorings and libcst only once the arguments
+    # are parsed, and not at all when forwarded to a daemon.
+    from pyro.project import Project
+
+    return Project(
+        root_path, cache_dir=get_cache_dir(root_path, cache_dir, no_cache)
+    )
+
+
+def get_daemon_socket(cache_dir: Path | None) -> Path | None:
+    if cache_dir is None:
+        return None
+    return cache_dir / client.DAEMON_SOCKET
+
+
+def forward_or_run(
+    socket_path: Path | None,
+    command: str,
+    args: dict[str, Any],
+    run: Callable[[], dict[str, Any]],
+) -> None:
+    """
+    Forwards the command to the daemon listening on `socket_path` if there
+    is one, runs it in this process otherwise.
+    """
+    if socket_path is not None:
+        outputs = client.request(socket_path, command, args)
+        if outputs is not None:
+            print(json.dumps(outputs))
+            return
+    print_outputs(run)
+
+
+def print_outputs(run: Callable[[], dict[str, Any]]) -> None:
+    try:
+        outputs = run()
+    except Exception as e:
+        err_trace = traceback.format_exc()
+        print(
+            json.dumps(
+                {"success": False, "errorMsg": str(e), "trace": err_trace}
+            )
+        )
+        return
+    print(json.dumps(outputs))
@@ -0,0 +1,36 @@
+import json
+import socket
+from pathlib import Path
+from typing import Any
+
+DAEMON_SOCKET = "daemon.sock"
+
+
+def request(
+    socket_path: Path,
+    command: str,
+    args: dict[str, Any],
+    timeout: float | None = None,
+) -> dict[str, Any] | None:
+    """
+    Sends a request to the pyro daemon listening on `socket_path` and
+    returns its response, or None if no daemon is running there.
+    """
+    if not socket_path.exists():
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        try:
+            client.connect(str(socket_path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            return None
+        payload = {"id": 0, "command": command, "args": args}
+        client.sendall(json.dumps(payload).encode() + b"\n")
+        with client.makefile("r") as responses:
+            line = responses.readline()
+    if not line:
+        return None
+    response = json.loads(line)
+    response.pop("id", None)
+    return response
@@ -0,0 +1,451 @@
+import json
+import os
+import re
+import time
+import tomllib
+from collections.abc import Generator, Iterable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pyro.cache import atomic_write_bytes, init_cache_dir
+
+MANIFEST_FORMAT = 1
+
+# Directories that never contain project code pyro should edit.
+DEFAULT_EXCLUDED_DIRS = frozenset(
+    [
+        ".bzr",
+        ".direnv",
+        ".eggs",
+        ".git",
+        ".hg",
+        ".mypy_cache",
+        ".nox",
+        ".pyro_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".svn",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "__pypackages__",
+        "node_modules",
+        "site-packages",
+        "venv",
+    ]
+)
+# Build outputs, only excluded at the project root since packages of the
+# project may have the same names.
+ROOT_EXCLUDED_DIRS = frozenset(["build", "dist"])
+
+
+def _translate_pattern(pattern: str) -> str:
+    """
+    Translates a gitignore glob into a regular expression matching paths
+    relative to the directory of the ignore file.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex += re.escape("[")
+                i += 1
+                continue
+            content = pattern[i + 1 : end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            regex += "[" + content.replace("\\", "\\\\") + "]"
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+@dataclass
+class IgnoreRule:
+    regex: re.Pattern[str]
+    negate: bool
+    dir_only: bool
+
+    @classmethod
+    def parse(cls, line: str) -> "IgnoreRule | None":
+        line = line.rstrip("\n")
+        if not line.strip() or line.startswith("#"):
+            return None
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+
+        # Patterns with a slash other than a trailing one are relative to
+        # the directory of the ignore file, others match at any depth.
+        if "/" in line:
+            regex = _translate_pattern(line.lstrip("/"))
+        else:
+            regex = "(?:.*/)?" + _translate_pattern(line)
+        return cls(re.compile(regex + r"\Z"), negate, dir_only)
+
+
+class IgnoreRules:
+    """
+    Rules of a single ignore file, located in the directory `base`
+    (relative to the project root, empty for the root itself).
+    """
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        self.rules: list[IgnoreRule] = []
+        for line in lines:
+            rule = IgnoreRule.parse(line)
+            if rule is not None:
+                self.rules.append(rule)
+
+    @classmethod
+    def from_file(cls, base: str, location: Path) -> "IgnoreRules | None":
+        try:
+            with open(location, "r", errors="replace") as f:
+                rules = cls(base, f.readlines())
+        except OSError:
+            return None
+        if not len(rules.rules):
+            return None
+        return rules
+
+    def match(self, rel_path: str, is_dir: bool) -> bool | None:
+        """
+        Returns whether `rel_path` is ignored by these rules, or None if no
+        rule applies to it. The last matching rule wins.
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1 :]
+
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path):
+                return not rule.negate
+        return None
+
+
+def is_ignored(
+    rules: Sequence[IgnoreRules], rel_path: str, is_dir: bool
+) -> bool:
+    # Deeper ignore files take precedence.
+    for rule in reversed(rules):
+        matched = rule.match(rel_path, is_dir)
+        if matched is not None:
+            return matched
+    return False
+
+
+@dataclass
+class DiscoveryConfig:
+    """
+    Configuration of the discovery of the modules of a project, read from
+    the `[tool.pyro]` table of its `pyproject.toml`:
+
+        [tool.pyro]
+        exclude = ["scripts/", "**/migrations/"]
+        include = ["src/**", "tests/**"]
+        respect-gitignore = true
+        follow-symlinks = false
+
+    `exclude` and `include` are gitignore-style patterns relative to the
+    project root. When `include` is given, only the modules matching one
+    of its patterns are discovered.
+
+    Raises ValueError if the file cannot be parsed or an option has the
+    wrong type.
+    """
+
+    exclude: list[str] = field(default_factory=list)
+    include: list[str] = field(default_factory=list)
+    respect_gitignore: bool = True
+    follow_symlinks: bool = False
+
+    @classmethod
+    def from_pyproject(cls, root: Path) -> "DiscoveryConfig":
+        location = root / "pyproject.toml"
+        if not location.is_file():
+            return cls()
+        with open(location, "rb") as f:
+            try:
+                pyproject = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"Cannot parse {location}: {e}") from e
+        config = pyproject.get("tool", {}).get("pyro", {})
+        if not isinstance(config, dict):
+            raise ValueError(f"[tool.pyro] must be a table in {location}.")
+
+        def get_patterns(key: str) -> list[str]:
+            patterns = config.get(key, [])
+            if not isinstance(patterns, list) or not all(
+                isinstance(pattern, str) for pattern in patterns
+            ):
+                raise ValueError(
+                    f"{key} must be a list of strings in [tool.pyro] of "
+                    f"{location}."
+                )
+            return patterns
+
+        def get_flag(key: str, default: bool) -> bool:
+            value = config.get(key, default)
+            if not isinstance(value, bool):
+                raise ValueError(
+                    f"{key} must be true or false in [tool.pyro] of "
+                    f"{location}."
+                )
+            return value
+
+        return cls(
+            exclude=get_patterns("exclude"),
+            include=get_patterns("include"),
+            respect_gitignore=get_flag("respect-gitignore", True),
+            follow_symlinks=get_flag("follow-symlinks", False),
+        )
+
+
+# Directories modified this recently may be modified again within the
+# resolution of their mtime, so their listing cannot be trusted later.
+RACY_INTERVAL_NS = 2_000_000_000
+
+
+@dataclass
+class DirectoryListing:
+    mtime_ns: int
+    dirs: list[str] = field(default_factory=list)
+    symlinks: list[str] = field(default_factory=list)
+    modules: list[str] = field(default_factory=list)
+    has_gitignore: bool = False
+    is_virtualenv: bool = False
+    racy: bool = False
+
+    @classmethod
+    def scan(cls, location: str, stat: os.stat_result) -> "DirectoryListing":
+        listing = cls(stat.st_mtime_ns)
+        listing.racy = time.time_ns() - stat.st_mtime_ns < RACY_INTERVAL_NS
+        with os.scandir(location) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                listing.dirs.append(entry.name)
+                if entry.is_symlink():
+                    listing.symlinks.append(entry.name)
+            elif entry.name.endswith(".py"):
+                listing.modules.append(entry.name)
+            elif entry.name == ".gitignore":
+                listing.has_gitignore = True
+            elif entry.name == "pyvenv.cfg":
+                listing.is_virtualenv = True
+        return listing
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "mtime_ns": self.mtime_ns,
+            "dirs": self.dirs,
+            "symlinks": self.symlinks,
+            "modules": self.modules,
+            "has_gitignore": self.has_gitignore,
+            "is_virtualenv": self.is_virtualenv,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "DirectoryListing":
+        return cls(
+            mtime_ns=data["mtime_ns"],
+            dirs=data["dirs"],
+            symlinks=data["symlinks"],
+            modules=data["modules"],
+            has_gitignore=data["has_gitignore"],
+            is_virtualenv=data["is_virtualenv"],
+        )
+
+
+class DirectoryManifest:
+    """
+    Listings of the directories of a project, keyed by their path relative
+    to the project root. A directory is only scanned again when its mtime
+    changed, which happens whenever an entry is added, removed or renamed
+    in it. If `location` is given, the manifest is persisted there so that
+    later runs can reuse it.
+    """
+
+    def __init__(self, location: Path | None = None):
+        self.location = location
+        self._listings: dict[str, DirectoryListing] = {}
+        self._dirty = False
+        if location is not None:
+            self._load()
+
+    def _load(self) -> None:
+        assert self.location is not None
+        try:
+            with open(self.location, "r") as f:
+                data = json.load(f)
+            if data.get("format") != MANIFEST_FORMAT:
+                return
+            self._listings = {
+                rel_dir: DirectoryListing.from_json(listing)
+                for rel_dir, listing in data["directories"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            self._listings = {}
+
+    def list_dir(
+        self, location: str, rel_dir: str, stat: os.stat_result
+    ) -> DirectoryListing:
+        listing = self._listings.get(rel_dir)
+        if (
+            listing is not None
+            and not listing.racy
+            and listing.mtime_ns == stat.st_mtime_ns
+        ):
+            return listing
+        listing = DirectoryListing.scan(location, stat)
+        self._listings[rel_dir] = listing
+        self._dirty = True
+        return listing
+
+    def invalidate(self, rel_dir: str) -> None:
+        if self._listings.pop(rel_dir, None) is not None:
+            self._dirty = True
+
+    def retain(self, rel_dirs: set[str]) -> None:
+        for rel_dir in set(self._listings) - rel_dirs:
+            del self._listings[rel_dir]
+            self._dirty = True
+
+    def save(self) -> None:
+        if self.location is None or not self._dirty:
+            return
+        data = {
+            "format": MANIFEST_FORMAT,
+            "directories": {
+                rel_dir: listing.to_json()
+                for rel_dir, listing in self._listings.items()
+                if not listing.racy
+            },
+        }
+        try:
+            init_cache_dir(self.location.parent)
+            atomic_write_bytes(self.location, json.dumps(data).encode())
+        except OSError:
+            return
+        self._dirty = False
+
+
+def discover_modules(
+    root: Path,
+    config: DiscoveryConfig | None = None,
+    manifest: DirectoryManifest | None = None,
+) -> Generator[str, None, None]:
+    """
+    Yields the paths of the python files of the project, relative to `root`
+    and in a stable order. Excluded directories are never entered, and
+    directories whose listing in `manifest` is up to date are not scanned.
+    """
+    if config is None:
+        config = DiscoveryConfig.from_pyproject(root)
+    if manifest is None:
+        manifest = DirectoryManifest()
+
+    base_rules: list[IgnoreRules] = []
+    if len(config.exclude):
+        base_rules.append(IgnoreRules("", config.exclude))
+    if config.respect_gitignore:
+        git_exclude = IgnoreRules.from_file("", root / ".git/info/exclude")
+        if git_exclude is not None:
+            base_rules.insert(0, git_exclude)
+    include = IgnoreRules("", config.include) if config.include else None
+
+    visited: set[tuple[int, int]] = set()
+    visited_dirs: set[str] = set()
+    stack: list[tuple[str, str, list[IgnoreRules]]] = [
+        (str(root), "", base_rules)
+    ]
+    while len(stack):
+        location, rel_dir, rules = stack.pop()
+
+        try:
+            stat = os.stat(location)
+            key = (stat.st_dev, stat.st_ino)
+            if key in visited:
+                continue
+            visited.add(key)
+            listing = manifest.list_dir(location, rel_dir, stat)
+        except OSError:
+            continue
+        visited_dirs.add(rel_dir)
+
+        if rel_dir and listing.is_virtualenv:
+            continue
+
+        if config.respect_gitignore and listing.has_gitignore:
+            gitignore = IgnoreRules.from_file(
+                rel_dir, Path(location) / ".gitignore"
+            )
+            if gitignore is not None:
+                rules = rules + [gitignore]
+
+        for name in listing.modules:
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if is_ignored(rules, rel_path, False):
+                continue
+            if include is not None and not include.match(rel_path, False):
+                continue
+            yield rel_path
+
+        subdirs: list[tuple[str, str, list[IgnoreRules]]] = []
+        for name in listing.dirs:
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if (
+                name in DEFAULT_EXCLUDED_DIRS
+                or (not rel_dir and name in ROOT_EXCLUDED_DIRS)
+                or name.endswith(".egg-info")
+                or is_ignored(rules, rel_path, True)
+            ):
+                continue
+            if name in listing.symlinks and not config.follow_symlinks:
+                continue
+            subdirs.append((os.path.join(location, name), rel_path, rules))
+        stack.extend(reversed(subdirs))
+
+    manifest.retain(visited_dirs)
+    manifest.save()
@@ -0,0 +1,143 @@
+import difflib
+import os
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class Edit:
+    location: Path
+    content: str
+    # None if the file does not exist yet.
+    original: str | None
+
+    def diff(self, filename: str) -> str:
+        """
+        Unified diff from the original content to the new one.
+        """
+        return "".join(
+            difflib.unified_diff(
+                (self.original or "").splitlines(keepends=True),
+                self.content.splitlines(keepends=True),
+                fromfile=(
+                    f"a/{filename}"
+                    if self.original is not None
+                    else "/dev/null"
+                ),
+                tofile=f"b/{filename}",
+            )
+        )
+
+
+def _read(location: Path) -> str | None:
+    try:
+        with open(location, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_temp(location: Path, content: str, fsync: bool = False) -> str:
+    fd, tmp_name = tempfile.mkstemp(
+        dir=location.parent, prefix=f".{location.name}.", suffix=".pyro"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_name, location.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_name, 0o644)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return tmp_name
+
+
+def _fsync_dir(location: Path) -> None:
+    fd = os.open(location, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EditSet:
+    """
+    New contents of several files, written together by `commit`.
+
+    Every file is first written to a temporary file next to it, then all
+    of them are renamed over their targets. If anything fails, the files
+    already replaced are restored to their original content.
+    """
+
+    def __init__(self) -> None:
+        self._edits: dict[Path, Edit] = {}
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def __iter__(self) -> Iterator[Edit]:
+        return iter(self._edits.values())
+
+    def add(
+        self, location: Path, content: str, original: str | None = None
+    ) -> bool:
+        """
+        Stages `content` for `location`. Returns False, and stages nothing,
+        if the file already has this content. `original` is the content the
+        edit replaces, read from the file if not given.
+        """
+        if location in self._edits:
+            original = self._edits[location].original
+        elif original is None:
+            original = _read(location)
+        if original == content:
+            self._edits.pop(location, None)
+            return False
+        self._edits[location] = Edit(location, content, original)
+        return True
+
+    def commit(self, fsync: bool = False) -> list[Path]:
+        """
+        Writes all the staged contents. With `fsync`, each file is flushed
+        to disk before it replaces its target, and the directories of the
+        files once all of them are replaced.
+        """
+        temp_files: dict[Path, str] = {}
+        replaced: list[Edit] = []
+        try:
+            for edit in self._edits.values():
+                temp_files[edit.location] = _write_temp(
+                    edit.location, edit.content, fsync
+                )
+            for edit in self._edits.values():
+                os.replace(temp_files[edit.location], edit.location)
+                del temp_files[edit.location]
+                replaced.append(edit)
+        except BaseException:
+            for tmp_name in temp_files.values():
+                try:
+                    os.unlink(tmp_name)
+                except FileNotFoundError:
+                    pass
+            self._rollback(replaced)
+            raise
+
+        if fsync:
+            for directory in {edit.location.parent for edit in replaced}:
+                _fsync_dir(directory)
+        return [edit.location for edit in replaced]
+
+    def _rollback(self, replaced: list[Edit]) -> None:
+        for edit in reversed(replaced):
+            if edit.original is None:
+                edit.location.unlink(missing_ok=True)
+                continue
+            tmp_name = _write_temp(edit.location, edit.original)
+            os.replace(tmp_name, edit.location)
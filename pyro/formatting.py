@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# black and isort are slow to import, they are only loaded when formatting.
+if TYPE_CHECKING:
+    import black
+
+
+def black_mode(root: Path) -> "black.Mode":
+    """
+    Black mode from the configuration black itself would use for files of
+    the project.
+    """
+    import black
+
+    pyproject = black.find_pyproject_toml((str(root.resolve()),))
+    if pyproject is None:
+        return black.Mode()
+    try:
+        config = black.parse_pyproject_toml(pyproject)
+    except (OSError, ValueError):
+        return black.Mode()
+
+    target_versions = set()
+    for version in config.get("target_version", []):
+        try:
+            target_versions.add(black.TargetVersion[version.upper()])
+        except KeyError:
+            continue
+    return black.Mode(
+        target_versions=target_versions,
+        line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+        string_normalization=not config.get(
+            "skip_string_normalization", False
+        ),
+        magic_trailing_comma=not config.get(
+            "skip_magic_trailing_comma", False
+        ),
+        preview=config.get("preview", False),
+    )
+
+
+class Formatter:
+    """
+    Runs isort (with the black profile) then black on source code, in
+    process.
+    """
+
+    def __init__(self, root: Path):
+        import isort
+
+        self._isort_config = isort.Config(
+            settings_path=str(root.resolve()), profile="black", quiet=True
+        )
+        self._black_mode = black_mode(root)
+
+    def format(self, content: str, location: Path | None = None) -> str:
+        import black
+        import isort
+        from isort.exceptions import ISortError
+
+        try:
+            content = isort.code(
+                content, config=self._isort_config, file_path=location
+            )
+        except ISortError:
+            pass
+
+        try:
+            return black.format_str(content, mode=self._black_mode)
+        except black.InvalidInput:
+            return content
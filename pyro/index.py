@@ -0,0 +1,359 @@
+import ast
+import json
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from pyro.cache import atomic_write_bytes, init_cache_dir
+from pyro.discovery import RACY_INTERVAL_NS
+
+if TYPE_CHECKING:
+    from pyro.project import Project
+
+INDEX_FORMAT = 1
+
+
+def resolve_relative_module(
+    module_name: str, level: int, target: str | None
+) -> str | None:
+    # Both `pkg.mod` and `pkg.__init__` live in the `pkg` package.
+    package = module_name.split(".")[:-1]
+    if level > 1:
+        if level - 1 > len(package):
+            return None
+        package = package[: len(package) - (level - 1)]
+    if target is not None:
+        package = package + target.split(".")
+    if not len(package):
+        return None
+    return ".".join(package)
+
+
+class ModuleImports(NamedTuple):
+    # Names bound to a module, which may give access to its submodules
+    # and parents through attributes: `import a.b`, or `b` in
+    # `from a import b` since it could be a submodule.
+    modules: set[str]
+    # Modules that symbols are imported from: `a` in `from a import b`.
+    from_modules: set[str]
+
+
+class Definition(NamedTuple):
+    module: str
+    name: str
+    # "function", "class" or "variable".
+    kind: str
+    # Lines start at 1 and columns at 0. As in libcst positions, the range
+    # of decorated definitions starts at `def` or `class`.
+    start: tuple[int, int]
+    end: tuple[int, int]
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.module}.{self.name}"
+
+
+def _parse(content: str) -> ast.Module | None:
+    try:
+        return ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+
+def gather_imports(content: str, module_name: str) -> ModuleImports | None:
+    """
+    Returns None if the module cannot be parsed.
+    """
+    tree = _parse(content)
+    if tree is None:
+        return None
+    return _gather_imports(tree, module_name)
+
+
+def _gather_imports(tree: ast.Module, module_name: str) -> ModuleImports:
+    imports = ModuleImports(set(), set())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.modules.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = resolve_relative_module(
+                    module_name, node.level, node.module
+                )
+            else:
+                base = node.module
+            if base is None:
+                continue
+            imports.from_modules.add(base)
+            for alias in node.names:
+                if alias.name != "*":
+                    imports.modules.add(f"{base}.{alias.name}")
+    return imports
+
+
+def gather_definitions(
+    tree: ast.Module, module_name: str
+) -> dict[str, Definition]:
+    """
+    Top-level definitions that can be moved, by name: functions, classes,
+    and variables assigned alone on their line. Only the first definition
+    of a name is kept.
+    """
+    statements_per_line = Counter(node.lineno for node in tree.body)
+    definitions: dict[str, Definition] = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            name, kind = node.name, "function"
+        elif isinstance(node, ast.ClassDef):
+            name, kind = node.name, "class"
+        elif statements_per_line[node.lineno] > 1:
+            continue
+        elif (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+        ):
+            name, kind = node.targets[0].id, "variable"
+        elif isinstance(node, ast.AnnAssign) and isinstance(
+            node.target, ast.Name
+        ):
+            name, kind = node.target.id, "variable"
+        else:
+            continue
+        if name in definitions or node.end_lineno is None:
+            continue
+        definitions[name] = Definition(
+            module_name,
+            name,
+            kind,
+            (node.lineno, node.col_offset),
+            (node.end_lineno, node.end_col_offset or 0),
+        )
+    return definitions
+
+
+def _is_related(imported: str, module_name: str) -> bool:
+    """
+    `import a` gives access to `a.b.c` through attributes, and so does
+    `import a.b.c.d`.
+    """
+    return (
+        imported == module_name
+        or module_name.startswith(imported + ".")
+        or imported.startswith(module_name + ".")
+    )
+
+
+class ModuleAnalysis(NamedTuple):
+    key: tuple[int, int]
+    # None if the module cannot be parsed.
+    imports: ModuleImports | None
+    definitions: dict[str, Definition]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "key": list(self.key),
+            "imports": (
+                None
+                if self.imports is None
+                else [
+                    sorted(self.imports.modules),
+                    sorted(self.imports.from_modules),
+                ]
+            ),
+            "definitions": [
+                [d.name, d.kind, *d.start, *d.end]
+                for d in self.definitions.values()
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, name: str, data: dict[str, Any]) -> "ModuleAnalysis":
+        imports = data["imports"]
+        return cls(
+            (data["key"][0], data["key"][1]),
+            (
+                None
+                if imports is None
+                else ModuleImports(set(imports[0]), set(imports[1]))
+            ),
+            {
+                symbol: Definition(
+                    name,
+                    symbol,
+                    kind,
+                    (start_line, start_col),
+                    (end_line, end_col),
+                )
+                for symbol, kind, start_line, start_col, end_line, end_col in data[
+                    "definitions"
+                ]
+            },
+        )
+
+
+class ImportGraph:
+    """
+    Graph of the imports between the modules of a project, along with an
+    index of the definitions of each module.
+
+    Imports and definitions are gathered without building the full CST, and
+    only modules whose content changed, according to
+    `Project.get_module_key`, are re-analyzed when the graph is refreshed.
+    If `location` is given, the analyses are persisted there so that later
+    runs do not read the modules that did not change.
+    """
+
+    def __init__(self, project: "Project", location: Path | None = None):
+        self._project = project
+        self.location = location
+        # Analyses persisted by previous runs, until the module is added.
+        self._stored: dict[str, ModuleAnalysis] | None = None
+        self._dirty = False
+        self._keys: dict[str, tuple[int, int]] = {}
+        self._imports: dict[str, ModuleImports | None] = {}
+        self._importers: defaultdict[str, set[str]] = defaultdict(set)
+        self._from_importers: defaultdict[str, set[str]] = defaultdict(set)
+        # Modules that could not be analyzed may import anything.
+        self._unknown: set[str] = set()
+        self._definitions: dict[str, dict[str, Definition]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def _load(self) -> dict[str, ModuleAnalysis]:
+        if self._stored is not None:
+            return self._stored
+        self._stored = {}
+        if self.location is None:
+            return self._stored
+        try:
+            with open(self.location, "r") as f:
+                data = json.load(f)
+            if data.get("format") != INDEX_FORMAT:
+                return self._stored
+            self._stored = {
+                name: ModuleAnalysis.from_json(name, analysis)
+                for name, analysis in data["modules"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            self._stored = {}
+        return self._stored
+
+    def save(self) -> None:
+        if self.location is None or not self._dirty:
+            return
+        now = time.time_ns()
+        analyses = dict(self._load())
+        for name, key in self._keys.items():
+            analyses[name] = ModuleAnalysis(
+                key, self._imports[name], self._definitions.get(name, {})
+            )
+        data = {
+            "format": INDEX_FORMAT,
+            "modules": {
+                name: analysis.to_json()
+                for name, analysis in analyses.items()
+                # Overlays are not saved, and modules modified this recently
+                # may change again without their key changing.
+                if analysis.key[0] >= 0
+                and now - analysis.key[0] >= RACY_INTERVAL_NS
+            },
+        }
+        try:
+            init_cache_dir(self.location.parent)
+            atomic_write_bytes(self.location, json.dumps(data).encode())
+        except OSError:
+            return
+        self._dirty = False
+
+    def _remove(self, name: str) -> None:
+        if self._load().pop(name, None) is not None or name in self._keys:
+            self._dirty = True
+        self._keys.pop(name, None)
+        self._unknown.discard(name)
+        self._definitions.pop(name, None)
+        imports = self._imports.pop(name, None)
+        if imports is None:
+            return
+        for targets, graph in [
+            (imports.modules, self._importers),
+            (imports.from_modules, self._from_importers),
+        ]:
+            for target in targets:
+                graph[target].discard(name)
+                if not len(graph[target]):
+                    del graph[target]
+
+    def _analyze(
+        self, name: str, key: tuple[int, int], content: str
+    ) -> ModuleAnalysis:
+        tree = _parse(content)
+        if tree is None:
+            return ModuleAnalysis(key, None, {})
+        return ModuleAnalysis(
+            key, _gather_imports(tree, name), gather_definitions(tree, name)
+        )
+
+    def _add(self, name: str, analysis: ModuleAnalysis) -> None:
+        self._keys[name] = analysis.key
+        imports = self._imports[name] = analysis.imports
+        if imports is None:
+            self._unknown.add(name)
+            return
+        self._definitions[name] = analysis.definitions
+        for target in imports.modules:
+            self._importers[target].add(name)
+        for target in imports.from_modules:
+            self._from_importers[target].add(name)
+
+    def update(self, names: Iterable[str]) -> None:
+        stored = self._load()
+        for name in names:
+            key = self._project.get_module_key(name)
+            if key is None:
+                self._remove(name)
+                continue
+            if self._keys.get(name) == key:
+                continue
+            # The analysis persisted by a previous run is used if the module
+            # did not change since.
+            analysis = stored.pop(name, None)
+            self._remove(name)
+            if analysis is None or analysis.key != key:
+                analysis = self._analyze(
+                    name, key, self._project.get_module_content(name)
+                )
+                self._dirty = True
+            self._add(name, analysis)
+        self.save()
+
+    def refresh(self) -> None:
+        names = set(self._project.iter_module_names())
+        for name in set(self._keys) - names:
+            self._remove(name)
+        for name in set(self._load()) - names:
+            self._remove(name)
+        self.update(names)
+
+    def find_definition(self, qualified_name: str) -> Definition | None:
+        """
+        Definition of `pkg.mod.Symbol`, among the modules of the graph.
+        """
+        module_name, _, name = qualified_name.rpartition(".")
+        return self._definitions.get(module_name, {}).get(name)
+
+    def importers_of(self, module_name: str) -> set[str]:
+        importers = set(self._unknown)
+        importers.update(self._from_importers.get(module_name, ()))
+        for target, names in self._importers.items():
+            if _is_related(target, module_name):
+                importers.update(names)
+        importers.discard(module_name)
+        return importers
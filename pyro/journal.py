@@ -0,0 +1,141 @@
+import difflib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from pyro.cache import atomic_write_bytes, content_hash, init_cache_dir
+from pyro.edits import EditSet
+
+JOURNAL_FORMAT = 1
+
+# Number of refactorings that can be undone.
+DEFAULT_JOURNAL_SIZE = 50
+
+
+class JournalError(Exception):
+    pass
+
+
+def reverse_diff(content: str, original: str) -> list[list[Any]]:
+    """
+    Operations turning the lines of `content` back into `original`, as
+    `[start, end, lines]` replacements of `content[start:end]`.
+    """
+    lines = content.splitlines(keepends=True)
+    original_lines = original.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, lines, original_lines)
+    return [
+        [i1, i2, original_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_reverse_diff(content: str, operations: list[list[Any]]) -> str:
+    lines = content.splitlines(keepends=True)
+    # Replacing from the end keeps the indices of earlier operations valid.
+    for start, end, replacement in reversed(operations):
+        lines[start:end] = replacement
+    return "".join(lines)
+
+
+class Journal:
+    """
+    On-disk journal of the refactorings applied to a project, used to undo
+    them. Each entry stores, for every edited file, the hash of its content
+    before and after the refactoring and the diff reverting it.
+    """
+
+    def __init__(self, directory: Path, size: int = DEFAULT_JOURNAL_SIZE):
+        self.directory = directory
+        self.size = size
+
+    def entries(self) -> list[Path]:
+        """
+        Journal entries, the most recent last.
+        """
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            entry
+            for entry in self.directory.iterdir()
+            if entry.suffix == ".json"
+        )
+
+    def record(self, root: Path, description: str, edits: EditSet) -> None:
+        files: list[dict[str, Any]] = []
+        for edit in edits:
+            files.append(
+                {
+                    "filename": edit.location.relative_to(root).as_posix(),
+                    "preHash": (
+                        None
+                        if edit.original is None
+                        else content_hash(edit.original)
+                    ),
+                    "postHash": content_hash(edit.content),
+                    "reverse": reverse_diff(edit.content, edit.original or ""),
+                }
+            )
+        if not len(files):
+            return
+
+        entry = {
+            "format": JOURNAL_FORMAT,
+            "description": description,
+            "time": time.time(),
+            "files": files,
+        }
+        init_cache_dir(self.directory.parent)
+        self.directory.mkdir(exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}.json"
+        atomic_write_bytes(self.directory / name, json.dumps(entry).encode())
+
+        for old_entry in self.entries()[: -self.size]:
+            old_entry.unlink(missing_ok=True)
+
+    def undo(self, root: Path) -> tuple[str, EditSet, list[Path]] | None:
+        """
+        Reverts the last refactoring. Returns its description, the staged
+        edits restoring the files it modified and the files it created, or
+        None if there is nothing to undo. The entry is removed from the
+        journal once the returned edits are applied with `pop`.
+        """
+        entries = self.entries()
+        if not len(entries):
+            return None
+        with open(entries[-1], "r") as f:
+            entry = json.load(f)
+        if entry.get("format") != JOURNAL_FORMAT:
+            raise JournalError(f"Unsupported journal entry {entries[-1]}.")
+
+        edits = EditSet()
+        created: list[Path] = []
+        for file in entry["files"]:
+            location = root / file["filename"]
+            try:
+                with open(location, "r") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                raise JournalError(f"{file['filename']} does not exist.")
+            if content_hash(content) != file["postHash"]:
+                raise JournalError(
+                    f"{file['filename']} was modified after the refactoring."
+                )
+            if file["preHash"] is None:
+                created.append(location)
+                continue
+            original = apply_reverse_diff(content, file["reverse"])
+            if content_hash(original) != file["preHash"]:
+                raise JournalError(
+                    f"Cannot restore {file['filename']}: journal corrupted."
+                )
+            edits.add(location, original)
+        return entry["description"], edits, created
+
+    def pop(self) -> None:
+        entries = self.entries()
+        if len(entries):
+            entries[-1].unlink(missing_ok=True)
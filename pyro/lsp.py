@@ -0,0 +1,443 @@
+import json
+import traceback
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, BinaryIO
+from urllib.parse import unquote, urlparse
+
+import libcst as cst
+from libcst.metadata import PositionProvider
+
+from pyro.edits import EditSet
+from pyro.project import Project
+from pyro.refactorings.move import get_symbol_name, stage_move
+from pyro.refactorings.reorder_func_args import stage_reorder_func_arg
+from pyro.version import __version__
+from pyro.watcher import Watcher
+
+SERVER_NOT_INITIALIZED = -32002
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+MOVE_COMMAND = "pyro.move"
+REORDER_COMMAND = "pyro.reorderFuncArg"
+
+# Text documents are synced incrementally.
+SYNC_INCREMENTAL = 2
+
+
+class LanguageServerError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def read_message(reader: BinaryIO) -> dict[str, Any] | None:
+    """
+    Reads a JSON-RPC message framed by a `Content-Length` header. Returns
+    None at the end of the stream.
+    """
+    length = None
+    while True:
+        line = reader.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.decode("ascii").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length is None:
+        raise ValueError("Missing Content-Length header")
+    return json.loads(reader.read(length))
+
+
+def write_message(writer: BinaryIO, message: dict[str, Any]) -> None:
+    body = json.dumps(message).encode()
+    writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii"))
+    writer.write(body)
+    writer.flush()
+
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def position_to_offset(text: str, line: int, character: int) -> int:
+    """
+    Offset in `text` of an LSP position, whose character is counted in
+    UTF-16 code units.
+    """
+    start = 0
+    for _ in range(line):
+        newline = text.find("\n", start)
+        if newline == -1:
+            return len(text)
+        start = newline + 1
+    end = text.find("\n", start)
+    if end == -1:
+        end = len(text)
+
+    offset = start
+    units = 0
+    while offset < end and units < character:
+        units += 2 if ord(text[offset]) > 0xFFFF else 1
+        offset += 1
+    return offset
+
+
+def end_position(text: str) -> dict[str, int]:
+    lines = text.split("\n")
+    return {"line": len(lines) - 1, "character": _utf16_length(lines[-1])}
+
+
+def uri_to_path(uri: str) -> Path | None:
+    parsed = urlparse(uri)
+    if parsed.scheme != "file":
+        return None
+    return Path(unquote(parsed.path))
+
+
+class LanguageServer:
+    """
+    Language server exposing pyro refactorings as code actions.
+
+    The content of open documents is kept as overlays of the project, so
+    refactorings run against the buffers of the editor, and their parsed
+    trees and metadata are reused until the buffers change. Refactorings
+    are never written to disk by the server: their edits are sent to the
+    client with a `workspace/applyEdit` request.
+
+    Code actions only locate the refactoring; the client completes their
+    arguments before executing them:
+
+        pyro.move: [{"uri", "line", "character", "destination"}]
+        pyro.reorderFuncArg: [{"uri", "funcName", "newOrder"}]
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        cache_dir: Path | None = None,
+        watch: bool = False,
+    ):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.watch = watch
+        self.project: Project | None = None
+        self.watcher: Watcher | None = None
+        self.running = True
+        self.shutdown_requested = False
+        self._uris: dict[str, str] = {}
+        self._next_id = 0
+        self._outgoing: list[dict[str, Any]] = []
+        self._methods: dict[str, Callable[[dict[str, Any]], Any]] = {
+            "initialize": self._initialize,
+            "initialized": lambda _: None,
+            "shutdown": self._shutdown,
+            "exit": self._exit,
+            "textDocument/didOpen": self._did_open,
+            "textDocument/didChange": self._did_change,
+            "textDocument/didClose": self._did_close,
+            "textDocument/codeAction": self._code_action,
+            "workspace/executeCommand": self._execute_command,
+        }
+
+    def handle(self, message: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Handles a message from the client and returns the messages to send
+        back, in order.
+        """
+        self._outgoing = []
+        method = message.get("method")
+        if method is None:
+            # Response to a request of the server.
+            return []
+        request_id = message.get("id")
+        try:
+            handler = self._methods.get(method)
+            if handler is None:
+                if request_id is not None:
+                    raise LanguageServerError(
+                        METHOD_NOT_FOUND, f"Unknown method {method}"
+                    )
+                return []
+            if self.project is None and method not in (
+                "initialize",
+                "exit",
+            ):
+                raise LanguageServerError(
+                    SERVER_NOT_INITIALIZED, "The server is not initialized"
+                )
+            result = handler(message.get("params") or {})
+        except LanguageServerError as e:
+            return self._reply_error(request_id, e.code, str(e))
+        except Exception as e:
+            return self._reply_error(
+                request_id, INTERNAL_ERROR, f"{e}\n{traceback.format_exc()}"
+            )
+        if request_id is not None:
+            self._outgoing.append(
+                {"jsonrpc": "2.0", "id": request_id, "result": result}
+            )
+        return self._outgoing
+
+    def _reply_error(
+        self, request_id: int | str | None, code: int, message: str
+    ) -> list[dict[str, Any]]:
+        if request_id is None:
+            # Notifications have no response, errors are only shown.
+            return [
+                {
+                    "jsonrpc": "2.0",
+                    "method": "window/showMessage",
+                    "params": {"type": 1, "message": message},
+                }
+            ]
+        return [
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": code, "message": message},
+            }
+        ]
+
+    def serve(self, reader: BinaryIO, writer: BinaryIO) -> None:
+        try:
+            while self.running:
+                message = read_message(reader)
+                if message is None:
+                    break
+                for response in self.handle(message):
+                    write_message(writer, response)
+        finally:
+            self.close()
+
+    def _initialize(self, params: dict[str, Any]) -> dict[str, Any]:
+        root = self.root
+        if root is None:
+            if params.get("rootUri"):
+                root = uri_to_path(params["rootUri"])
+            elif params.get("rootPath"):
+                root = Path(params["rootPath"])
+        if root is None:
+            raise LanguageServerError(
+                INVALID_PARAMS, "The workspace has no root folder"
+            )
+        self.project = Project(root.resolve(), cache_dir=self.cache_dir)
+        if self.watch:
+            self.watcher = Watcher(self.project).start()
+        return {
+            "capabilities": {
+                "textDocumentSync": {
+                    "openClose": True,
+                    "change": SYNC_INCREMENTAL,
+                },
+                "codeActionProvider": {
+                    "codeActionKinds": ["refactor.move", "refactor.rewrite"]
+                },
+                "executeCommandProvider": {
+                    "commands": [MOVE_COMMAND, REORDER_COMMAND]
+                },
+            },
+            "serverInfo": {"name": "pyro", "version": __version__},
+        }
+
+    def _shutdown(self, _: dict[str, Any]) -> None:
+        self.shutdown_requested = True
+
+    def _exit(self, _: dict[str, Any]) -> None:
+        self.running = False
+        self.close()
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def _get_project(self) -> Project:
+        assert self.project is not None
+        return self.project
+
+    def get_module_name(self, uri: str) -> str | None:
+        """
+        Name of the project module of the document `uri`, or None if the
+        document is not a module of the project.
+        """
+        project = self._get_project()
+        location = uri_to_path(uri)
+        if location is None or location.suffix != ".py":
+            return None
+        location = location.resolve()
+        if not location.is_relative_to(project.root):
+            return None
+        return project.get_module_name(location)
+
+    def _require_module_name(self, uri: str) -> str:
+        name = self.get_module_name(uri)
+        if name is None:
+            raise LanguageServerError(
+                INVALID_PARAMS, f"{uri} is not a module of the project"
+            )
+        return name
+
+    def _did_open(self, params: dict[str, Any]) -> None:
+        document = params["textDocument"]
+        name = self.get_module_name(document["uri"])
+        if name is None:
+            return
+        self._uris[name] = document["uri"]
+        self._get_project().set_overlay(name, document["text"])
+
+    def _did_change(self, params: dict[str, Any]) -> None:
+        name = self.get_module_name(params["textDocument"]["uri"])
+        project = self._get_project()
+        if name is None or name not in project.overlays:
+            return
+        text = project.overlays[name].content
+        for change in params["contentChanges"]:
+            if "range" not in change:
+                text = change["text"]
+                continue
+            start = change["range"]["start"]
+            end = change["range"]["end"]
+            start_offset = position_to_offset(
+                text, start["line"], start["character"]
+            )
+            end_offset = position_to_offset(
+                text, end["line"], end["character"]
+            )
+            text = text[:start_offset] + change["text"] + text[end_offset:]
+        project.set_overlay(name, text)
+
+    def _did_close(self, params: dict[str, Any]) -> None:
+        name = self.get_module_name(params["textDocument"]["uri"])
+        if name is None:
+            return
+        self._uris.pop(name, None)
+        self._get_project().remove_overlay(name)
+
+    def _code_action(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        uri = params["textDocument"]["uri"]
+        name = self.get_module_name(uri)
+        if name is None:
+            return []
+        project = self._get_project()
+        try:
+            module = project.get_module(name)
+        except (cst.ParserSyntaxError, OSError):
+            return []
+
+        # Lines are 1-based in libcst, 0-based in LSP.
+        line = params["range"]["start"]["line"] + 1
+        wrapper = project.get_metadata_wrapper(name, module)
+        positions = wrapper.resolve(PositionProvider)
+        actions: list[dict[str, Any]] = []
+        for statement in wrapper.module.body:
+            code_range = positions[statement]
+            if not code_range.start.line <= line <= code_range.end.line:
+                continue
+            symbol_name = get_symbol_name(statement)
+            if symbol_name is None:
+                break
+            title = f"Move '{symbol_name}' to another module"
+            actions.append(
+                {
+                    "title": title,
+                    "kind": "refactor.move",
+                    "command": {
+                        "title": title,
+                        "command": MOVE_COMMAND,
+                        "arguments": [
+                            {
+                                "uri": uri,
+                                "line": code_range.start.line,
+                                "character": code_range.start.column,
+                                "symbol": symbol_name,
+                            }
+                        ],
+                    },
+                }
+            )
+            if isinstance(statement, cst.FunctionDef):
+                title = f"Reorder the arguments of '{symbol_name}'"
+                actions.append(
+                    {
+                        "title": title,
+                        "kind": "refactor.rewrite",
+                        "command": {
+                            "title": title,
+                            "command": REORDER_COMMAND,
+                            "arguments": [
+                                {"uri": uri, "funcName": symbol_name}
+                            ],
+                        },
+                    }
+                )
+            break
+        return actions
+
+    def _execute_command(self, params: dict[str, Any]) -> None:
+        command = params.get("command")
+        arguments = params.get("arguments") or [{}]
+        args = arguments[0]
+        project = self._get_project()
+        try:
+            if command == MOVE_COMMAND:
+                edits, description = stage_move(
+                    project,
+                    self._require_module_name(args["uri"]),
+                    args["line"],
+                    args["character"],
+                    args["destination"],
+                )
+            elif command == REORDER_COMMAND:
+                edits, description = stage_reorder_func_arg(
+                    project,
+                    self._require_module_name(args["uri"]),
+                    args["funcName"],
+                    args["newOrder"],
+                )
+            else:
+                raise LanguageServerError(
+                    INVALID_PARAMS, f"Unknown command {command}"
+                )
+        except KeyError as e:
+            raise LanguageServerError(
+                INVALID_PARAMS, f"Missing argument {e} for {command}"
+            )
+
+        self._next_id += 1
+        self._outgoing.append(
+            {
+                "jsonrpc": "2.0",
+                "id": f"pyro-{self._next_id}",
+                "method": "workspace/applyEdit",
+                "params": {
+                    "label": description,
+                    "edit": self.workspace_edit(edits),
+                },
+            }
+        )
+
+    def workspace_edit(self, edits: EditSet) -> dict[str, Any]:
+        """
+        LSP WorkspaceEdit replacing the whole content of each edited file.
+        """
+        project = self._get_project()
+        changes: dict[str, list[dict[str, Any]]] = {}
+        for edit in edits:
+            name = project.get_module_name(edit.location)
+            uri = self._uris.get(name, edit.location.as_uri())
+            changes[uri] = [
+                {
+                    "range": {
+                        "start": {"line": 0, "character": 0},
+                        "end": end_position(edit.original or ""),
+                    },
+                    "newText": edit.content,
+                }
+            ]
+        return {"changes": changes}
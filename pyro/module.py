@@ -1,21 +1,60 @@
+from collections import deque
+
 import libcst as cst
 from libcst.metadata import MetadataWrapper
 
 
 class Module:
-    def __init__(self, module: cst.Module):
-        self.history: list[cst.Module] = []
+    """
+    A parsed module, updated in place by visitors.
+
+    Previous trees are kept in `history`: all of them if `history_size` is
+    None, the last `history_size` ones otherwise (0 disables the history).
+    With `source_history`, the source code of the previous trees is kept
+    instead of the trees themselves, which uses much less memory.
+    """
+
+    def __init__(
+        self,
+        module: cst.Module,
+        history_size: int | None = None,
+        source_history: bool = False,
+    ):
+        self.history: deque[cst.Module | str] = deque(maxlen=history_size)
+        self.source_history = source_history
         self.tree = module
+        self._original = module
 
     @classmethod
-    def from_content(cls, content: str) -> "Module":
-        return cls(cst.parse_module(content))
+    def from_content(
+        cls,
+        content: str,
+        history_size: int | None = None,
+        source_history: bool = False,
+    ) -> "Module":
+        return cls(cst.parse_module(content), history_size, source_history)
 
     def get_content(self) -> str:
         return self.tree.code
 
+    def is_original(self) -> bool:
+        """
+        Whether the tree is still the one the module was created with.
+        """
+        return self.tree is self._original
+
+    def is_modified(self) -> bool:
+        return (
+            self.tree is not self._original
+            and self.tree.code != self._original.code
+        )
+
     def update(self, new_tree: cst.Module):
-        self.history.append(self.tree)
+        if self.history.maxlen != 0:
+            if self.source_history:
+                self.history.append(self.tree.code)
+            else:
+                self.history.append(self.tree)
         self.tree = new_tree
 
     def visit(self, visitor: cst.CSTVisitorT) -> cst.Module:
@@ -1,25 +1,137 @@
-import subprocess
-from collections.abc import Generator
+from collections import Counter
+from collections.abc import Callable, Generator, Iterable
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import libcst as cst
+from libcst.metadata import MetadataWrapper
+
+from pyro.cache import (
+    DEFAULT_MEMORY_BUDGET,
+    ModuleCache,
+    ParseCache,
+    index_name,
+    journal_name,
+    manifest_name,
+)
+from pyro.discovery import (
+    DirectoryManifest,
+    DiscoveryConfig,
+    discover_modules,
+)
+from pyro.edits import EditSet
+from pyro.formatting import Formatter
+from pyro.index import Definition, ImportGraph
+from pyro.journal import Journal
 from pyro.module import Module
+from pyro.timings import Timings
+
+if TYPE_CHECKING:
+    from pyro.watcher import Watcher
+
+
+# Work counted by `Project.counters`, all reported even when zero:
+#   modulesDiscovered: modules found when listing the project
+#   modulesWalked: modules yielded by `walk_modules`
+#   modulesSkipped: modules skipped by the predicate of `filter_modules`
+#   modulesParsed: modules parsed, not found in any cache
+#   moduleCacheHits, parseCacheHits: trees found in each cache
+#   metadataWrappers: metadata wrappers built
+#   importsUpdated: passes of `ReplaceImport` that changed a module
+#   filesFormatted: sources run through the formatter
+COUNTERS = (
+    "modulesDiscovered",
+    "modulesWalked",
+    "modulesSkipped",
+    "modulesParsed",
+    "moduleCacheHits",
+    "parseCacheHits",
+    "metadataWrappers",
+    "importsUpdated",
+    "filesFormatted",
+)
+
 
+@dataclass
+class Overlay:
+    """
+    Unsaved content of a module, used instead of the content of its file.
+    Its tree and metadata are kept until the content changes.
+    """
 
-def reformat_file(location: Path) -> None:
-    source_file = str(location.resolve())
-    subprocess.run(["isort", "--profile", "black", "-q", source_file])
-    subprocess.run(["black", "--fast", "-q", source_file])
+    content: str
+    version: int
+    tree: cst.Module | None = None
+    wrapper: MetadataWrapper | None = None
+    exports: frozenset[str] | None = None
 
 
 class Project:
-    def __init__(self, root: Path):
+    def __init__(
+        self,
+        root: Path,
+        cache_dir: Path | None = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        history_size: int | None = 0,
+        source_history: bool = False,
+    ):
+        """
+        `history_size` and `source_history` configure the history of the
+        modules returned by `get_module`, which is disabled by default.
+        """
         assert root.is_dir()
 
         self.root = root
+        self.history_size = history_size
+        self.source_history = source_history
+        self.discovery_config = DiscoveryConfig.from_pyproject(root)
+        # Work done on the project, see `COUNTERS`.
+        self.counters: Counter[str] = Counter()
+        self.module_cache = ModuleCache(memory_budget, self.counters)
+        self._formatter: Formatter | None = None
+        self.parse_cache: ParseCache | None = None
+        self.manifest = DirectoryManifest()
+        self.journal: Journal | None = None
+        self.overlays: dict[str, Overlay] = {}
+        self._overlay_version = 0
+        if cache_dir is not None:
+            self.parse_cache = ParseCache(cache_dir)
+            self.journal = Journal(cache_dir / journal_name(root))
+            self.manifest = DirectoryManifest(cache_dir / manifest_name(root))
+            resolved_cache_dir = cache_dir.resolve()
+            if resolved_cache_dir.is_relative_to(root.resolve()):
+                rel_cache_dir = resolved_cache_dir.relative_to(root.resolve())
+                if rel_cache_dir.parts:
+                    self.discovery_config.exclude.append(
+                        f"/{rel_cache_dir.as_posix()}/"
+                    )
+        self.import_graph = ImportGraph(
+            self, None if cache_dir is None else cache_dir / index_name(root)
+        )
+        # Set by `Watcher.start`.
+        self.watcher: "Watcher | None" = None
+        # Set by `collect_timings`.
+        self.timings: Timings | None = None
+
+    def timed(
+        self, phase: str, module: str | None = None
+    ) -> AbstractContextManager[None]:
+        """
+        Counts the time spent in the block in `phase` of the timings of the
+        project, if they are being collected.
+        """
+        if self.timings is None:
+            return nullcontext()
+        return self.timings.phase(phase, module)
 
     def get_module_path(self, name: str) -> Path:
         return self.root / (name.replace(".", "/") + ".py")
 
+    def get_module_name(self, location: Path) -> str:
+        return ".".join(location.relative_to(self.root).with_suffix("").parts)
+
     def create_module(self, name: str, content: str) -> None:
         module_path = name.split(".")
         for k in range(len(module_path) - 1):
@@ -47,29 +159,254 @@ class Project:
         if not init_file.exists():
             init_file.touch()
 
+    def set_overlay(self, name: str, content: str) -> None:
+        """
+        Makes the module `name` read as `content` instead of the content of
+        its file, until `remove_overlay` is called. Refactorings then stage
+        their edits from this content, but committing them still writes the
+        files.
+        """
+        overlay = self.overlays.get(name)
+        if overlay is not None and overlay.content == content:
+            return
+        self._overlay_version += 1
+        self.overlays[name] = Overlay(content, self._overlay_version)
+
+    def remove_overlay(self, name: str) -> None:
+        if self.overlays.pop(name, None) is not None:
+            if name in self.import_graph:
+                self.import_graph.update([name])
+
+    def get_module_key(self, name: str) -> tuple[int, int] | None:
+        """
+        Key changing whenever the content of the module `name` changes, or
+        None if the module does not exist.
+        """
+        overlay = self.overlays.get(name)
+        if overlay is not None:
+            return (-1, overlay.version)
+        try:
+            stat = self.get_module_path(name).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
     def get_module_content(self, name: str) -> str:
+        overlay = self.overlays.get(name)
+        if overlay is not None:
+            return overlay.content
         location = self.get_module_path(name)
         with open(location, "r") as f:
             return f.read()
 
+    def get_module_bytes(self, name: str) -> bytes:
+        overlay = self.overlays.get(name)
+        if overlay is not None:
+            return overlay.content.encode()
+        location = self.get_module_path(name)
+        with open(location, "rb") as f:
+            return f.read()
+
     def save_module_content(
         self, name: str, content: str, reformat: bool = False
     ) -> None:
         location = self.get_module_path(name)
+        if reformat:
+            content = self.format_source(content, location)
+
+        if location.is_file():
+            with open(location, "r") as f:
+                if f.read() == content:
+                    return
+
+        self.module_cache.invalidate(name)
         with open(location, "w") as f:
             f.write(content)
 
+    def stage_module_content(
+        self, edits: EditSet, name: str, content: str, reformat: bool = True
+    ) -> bool:
+        location = self.get_module_path(name)
         if reformat:
-            reformat_file(location)
+            with self.timed("format", name):
+                content = self.format_source(content, location)
+        overlay = self.overlays.get(name)
+        if overlay is not None:
+            return edits.add(location, content, overlay.content)
+        return edits.add(location, content)
+
+    def commit(self, edits: EditSet, fsync: bool = False) -> list[str]:
+        """
+        Writes all staged edits at once and returns the names of the
+        modules that were written.
+        """
+        names = [self.get_module_name(edit.location) for edit in edits]
+        try:
+            with self.timed("write"):
+                edits.commit(fsync=fsync)
+        finally:
+            for name in names:
+                self.module_cache.invalidate(name)
+        return names
+
+    def format_source(self, content: str, location: Path | None = None) -> str:
+        if self._formatter is None:
+            self._formatter = Formatter(self.root)
+        self.counters["filesFormatted"] += 1
+        return self._formatter.format(content, location)
 
     def get_module(self, name: str) -> Module:
+        with self.timed("parse", name):
+            return self._get_module(name)
+
+    def _get_module(self, name: str) -> Module:
+        overlay = self.overlays.get(name)
+        if overlay is not None:
+            if overlay.tree is None:
+                overlay.tree = cst.parse_module(overlay.content)
+                self.counters["modulesParsed"] += 1
+            return self._new_module(overlay.tree)
+
+        location = self.get_module_path(name)
+        stat = location.stat()
+        tree = self.module_cache.get(name, stat)
+        if tree is not None:
+            self.counters["moduleCacheHits"] += 1
+            return self._new_module(tree)
+
         content = self.get_module_content(name)
-        return Module.from_content(content)
+        if self.parse_cache is not None:
+            tree = self.parse_cache.get(location, content)
+            if tree is not None:
+                self.counters["parseCacheHits"] += 1
+        if tree is None:
+            tree = cst.parse_module(content)
+            self.counters["modulesParsed"] += 1
+            if self.parse_cache is not None:
+                self.parse_cache.put(location, content, tree)
+
+        self.module_cache.put(name, stat, tree)
+        return self._new_module(tree)
+
+    def get_metadata_wrapper(
+        self, name: str, module: Module
+    ) -> MetadataWrapper:
+        """
+        Metadata wrapper for the current tree of `module`. The metadata
+        resolved on unmodified modules is cached along with their tree.
+        """
+        overlay = self.overlays.get(name)
+        if overlay is not None and overlay.tree is module.tree:
+            if overlay.wrapper is None:
+                overlay.wrapper = self.new_metadata_wrapper(
+                    module.tree, unsafe_skip_copy=True
+                )
+            return overlay.wrapper
+
+        wrapper = self.module_cache.get_wrapper(name, module.tree)
+        if wrapper is None:
+            return self.new_metadata_wrapper(module.tree)
+        return wrapper
+
+    def new_metadata_wrapper(
+        self, tree: cst.Module, unsafe_skip_copy: bool = False
+    ) -> MetadataWrapper:
+        """
+        Uncached metadata wrapper for `tree`, for trees that were modified.
+        """
+        self.counters["metadataWrappers"] += 1
+        return MetadataWrapper(tree, unsafe_skip_copy=unsafe_skip_copy)
+
+    def get_exports(self, name: str, module: Module) -> set[str]:
+        """
+        Names listed in `__all__` by `module`. They are cached along with
+        the tree of unmodified modules, and modules whose source does not
+        contain `__all__` are not visited at all.
+        """
+        overlay = self.overlays.get(name)
+        if overlay is not None and overlay.tree is module.tree:
+            if overlay.exports is None:
+                overlay.exports = self._find_exports(name, module)
+            return set(overlay.exports)
+
+        exports = self.module_cache.get_exports(name, module.tree)
+        if exports is None:
+            exports = self._find_exports(name, module)
+            self.module_cache.put_exports(name, module.tree, exports)
+        return set(exports)
+
+    def _find_exports(self, name: str, module: Module) -> frozenset[str]:
+        from pyro.refactorings.imports import GatherExportsVisitor
+
+        if module.is_original() and b"__all__" not in self.get_module_bytes(
+            name
+        ):
+            return frozenset()
+        export_gatherer = GatherExportsVisitor()
+        module.tree.visit(export_gatherer)
+        return frozenset(export_gatherer.explicit_exported_objects)
+
+    def _new_module(self, tree: cst.Module) -> Module:
+        return Module(tree, self.history_size, self.source_history)
 
     def save_module(self, name: str, module: Module) -> None:
         self.save_module_content(name, module.get_content(), reformat=True)
 
-    def walk_modules(self) -> Generator[tuple[str, Module], None, None]:
-        for path in self.root.rglob("*.py"):
-            name = ".".join(path.relative_to(self.root).with_suffix("").parts)
-            yield name, self.get_module(name)
+    def iter_module_names(self) -> Generator[str, None, None]:
+        for path in discover_modules(
+            self.root, self.discovery_config, self.manifest
+        ):
+            self.counters["modulesDiscovered"] += 1
+            yield ".".join(Path(path).with_suffix("").parts)
+
+    def walk_modules(
+        self,
+        names: Iterable[str] | None = None,
+        predicate: Callable[[bytes], bool] | None = None,
+    ) -> Generator[tuple[str, Module], None, None]:
+        """
+        If given, `predicate` is called with the raw content of each module
+        and modules for which it returns False are skipped before being
+        parsed.
+        """
+        if names is None:
+            names = self.iter_module_names()
+        if predicate is not None:
+            names = self.filter_modules(names, predicate)
+        for name in names:
+            module = self.get_module(name)
+            self.counters["modulesWalked"] += 1
+            yield name, module
+
+    def filter_modules(
+        self, names: Iterable[str], predicate: Callable[[bytes], bool]
+    ) -> Generator[str, None, None]:
+        for name in names:
+            if predicate(self.get_module_bytes(name)):
+                yield name
+            else:
+                self.counters["modulesSkipped"] += 1
+
+    def find_definition(self, module_name: str, name: str) -> Definition:
+        """
+        Top-level definition of `name` in the module `module_name`, found in
+        the index of the project. The module is only analyzed again if it
+        changed since it was indexed.
+        """
+        self.import_graph.update([module_name])
+        definition = self.import_graph.find_definition(f"{module_name}.{name}")
+        if definition is None:
+            raise ValueError(f"No symbol named {name} found in {module_name}.")
+        return definition
+
+    def get_importers(self, name: str) -> list[str]:
+        """
+        Modules that may depend on the module `name`, in a stable order.
+        """
+        with self.timed("discovery"):
+            if self.watcher is not None:
+                self.watcher.sync()
+                self.import_graph.update(self.overlays)
+            else:
+                self.import_graph.refresh()
+        return sorted(self.import_graph.importers_of(name))
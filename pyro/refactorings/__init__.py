@@ -1,4 +1,4 @@
 from pyro.refactorings.imports import RemoveUnusedImports
-from pyro.refactorings.move import move
+from pyro.refactorings.move import move, move_symbol
 
-__all__ = ["move", "RemoveUnusedImports"]
+__all__ = ["move", "move_symbol", "RemoveUnusedImports"]
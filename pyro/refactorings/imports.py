@@ -1,5 +1,5 @@
 from collections import defaultdict
-from collections.abc import Iterable, Sequence
+from collections.abc import Callable, Iterable, Mapping, Sequence
 from typing import Union, cast
 
 import libcst as cst
@@ -7,7 +7,9 @@ import libcst.matchers as m
 from libcst.helpers import get_full_name_for_node
 from libcst.metadata import (
     Assignment,
+    BaseAssignment,
     BuiltinScope,
+    CodeRange,
     ImportAssignment,
     ParentNodeProvider,
     Scope,
@@ -59,6 +61,27 @@ def get_import(module_name: Sequence[str], symbol_name: str) -> cst.ImportFrom:
     )
 
 
+def may_reference(
+    module_name: Sequence[str], symbol_name: str
+) -> Callable[[bytes], bool]:
+    """
+    Cheap filter on the raw content of a module, ruling out modules that
+    cannot import `symbol_name` from `module_name`. Any import of the
+    symbol, aliased, relative or through attributes, contains both the
+    name of the module and the name of the symbol.
+    """
+    module_parts = [part for part in module_name if part != "__init__"]
+    tokens = [symbol_name]
+    if len(module_parts):
+        tokens.append(module_parts[-1])
+    if not all(token.isascii() for token in tokens):
+        # The file encoding is unknown at this point.
+        return lambda _: True
+
+    encoded = [token.encode() for token in tokens]
+    return lambda content: all(token in content for token in encoded)
+
+
 def find_unused_imports(
     scopes: Iterable[Scope | None], exports: set[str] | None = None
 ) -> dict[cst.Import | cst.ImportFrom, set[str]]:
@@ -84,6 +107,73 @@ def find_unused_imports(
     return unused_imports
 
 
+def _is_inside(code_range: CodeRange, ranges: Sequence[CodeRange]) -> bool:
+    start = (code_range.start.line, code_range.start.column)
+    end = (code_range.end.line, code_range.end.column)
+    return any(
+        (outer.start.line, outer.start.column) <= start
+        and end <= (outer.end.line, outer.end.column)
+        for outer in ranges
+    )
+
+
+def is_referenced_outside(
+    assignment: BaseAssignment,
+    positions: Mapping[cst.CSTNode, CodeRange],
+    ranges: Sequence[CodeRange],
+) -> bool:
+    """
+    Whether `assignment` has a reference outside of the code `ranges`.
+    """
+    for reference in assignment.references:
+        code_range = positions.get(reference.node)
+        if code_range is None or not _is_inside(code_range, ranges):
+            return True
+    return False
+
+
+def find_imports_unused_after_removal(
+    scopes: Iterable[Scope | None],
+    positions: Mapping[cst.CSTNode, CodeRange],
+    removed_ranges: Sequence[CodeRange],
+    exports: set[str] | None = None,
+) -> dict[cst.Import | cst.ImportFrom, set[str]]:
+    """
+    Imported names that are only referenced in the code removed from
+    `removed_ranges`. Unlike `find_unused_imports`, names that were already
+    unused are left alone, and the scopes of the module before the removal
+    are enough.
+    """
+    mod_exports = exports or set()
+    unused_imports: dict[cst.Import | cst.ImportFrom, set[str]] = defaultdict(
+        set
+    )
+    for scope in scopes:
+        if scope is None:
+            continue
+        for assignment in scope.assignments:
+            if (
+                isinstance(assignment, Assignment)
+                and isinstance(assignment.node, (cst.Import, cst.ImportFrom))
+                and len(assignment.references)
+                and assignment.name not in mod_exports
+                and not is_referenced_outside(
+                    assignment, positions, removed_ranges
+                )
+            ):
+                unused_imports[assignment.node].add(assignment.name)
+    return unused_imports
+
+
+def imported_name(name: cst.ImportAlias) -> str:
+    """
+    Name bound by an imported name, dotted for `import a.b`.
+    """
+    if name.asname is not None:
+        return cst.ensure_type(name.asname.name, cst.Name).value
+    return ".".join(sequence_from_attr(name.name))
+
+
 def sequence_from_attr(node: cst.BaseExpression) -> list[str]:
     return [node.value for node in sequence_of_names(node)]
 
@@ -108,6 +198,18 @@ class RemoveUnusedImports(cst.CSTTransformer):
 
         self.unused_imports = find_unused_imports(scopes, exports)
 
+    @classmethod
+    def from_unused_imports(
+        cls, unused_imports: Mapping[cst.Import | cst.ImportFrom, set[str]]
+    ) -> "RemoveUnusedImports":
+        """
+        Removes the given names of each import node, found without
+        resolving the scopes of the module again.
+        """
+        transformer = cls([])
+        transformer.unused_imports.update(unused_imports)
+        return transformer
+
     def leave_import_alike(
         self,
         original_node: cst.Import | cst.ImportFrom,
@@ -123,12 +225,7 @@ class RemoveUnusedImports(cst.CSTTransformer):
             return updated_node
 
         for name in cast(Sequence[cst.ImportAlias], names):
-            asname = name.asname
-            if asname is not None:
-                name_value = cst.ensure_type(asname.name, cst.Name).value
-            else:
-                name_value = cst.ensure_type(name.name, cst.Name).value
-            if name_value not in self.unused_imports[original_node]:
+            if imported_name(name) not in self.unused_imports[original_node]:
                 names_to_keep.append(
                     name.with_changes(comma=cst.MaybeSentinel.DEFAULT)
                 )
@@ -259,12 +356,14 @@ class ReplaceImport(cst.CSTTransformer):
         self._mod_exports = mod_exports
         self._should_add_import = False
         self.did_update = False
-        self._old_import_computed: bool = False
-        self._old_import: cst.Import | cst.ImportFrom | None = None
-        self._other_assignments: bool = False
+        self._replaced_imports_computed: bool = False
+        # Import statements of the symbol, each replaced in place.
+        self._replaced_imports: set[cst.Import | cst.ImportFrom] = set()
         self._ref_replacements: set[
             cst.Name | cst.Attribute | cst.BaseString
         ] = set()
+        # Names of the import statements whose references are all replaced.
+        self._unused_names: dict[cst.Import | cst.ImportFrom, set[str]] = {}
 
     def _get_full_call_attr(
         self, node: cst.CSTNode
@@ -286,18 +385,11 @@ class ReplaceImport(cst.CSTTransformer):
             ] + attr, par_node if par_node is not None else node
         return [], None
 
-    def _get_old_import(
-        self,
-    ) -> tuple[cst.Import | cst.ImportFrom | None, bool]:
-        if self._old_import_computed:
-            return (
-                self._old_import,
-                self._other_assignments,
-            )
+    def _get_replaced_imports(self) -> set[cst.Import | cst.ImportFrom]:
+        if self._replaced_imports_computed:
+            return self._replaced_imports
 
-        self._old_import_computed = True
-        assignment_node: cst.Import | cst.ImportFrom | None = None
-        other_assignments: bool = False
+        self._replaced_imports_computed = True
         for scope in self._scopes:
             if scope is None or isinstance(scope, BuiltinScope):
                 continue
@@ -305,6 +397,7 @@ class ReplaceImport(cst.CSTTransformer):
                 if isinstance(assignment, ImportAssignment) and isinstance(
                     assignment.node, (cst.ImportFrom, cst.Import)
                 ):
+                    replaced = kept = False
                     for reference in assignment.references:
                         ref_attr_strs, ref_attr = self._get_full_call_attr(
                             reference.node
@@ -319,10 +412,13 @@ class ReplaceImport(cst.CSTTransformer):
                         ):
                             if self._from[-1] == ref_attr_strs[-1]:
                                 self._should_add_import = True
-                                assignment_node = assignment.node
+                                self._replaced_imports.add(assignment.node)
                                 self._ref_replacements.add(ref_attr)
+                                replaced = True
                             else:
-                                other_assignments = True
+                                kept = True
+                        else:
+                            kept = True
 
                     for export in self._mod_exports:
                         if assignment.name != export:
@@ -335,13 +431,40 @@ class ReplaceImport(cst.CSTTransformer):
                         ):
                             if self._from[-1] == export:
                                 self._should_add_import = True
-                                assignment_node = assignment.node
+                                self._replaced_imports.add(assignment.node)
+                                replaced = True
                             else:
-                                other_assignments = True
-
-        self._old_import = assignment_node
-        self._other_assignments = other_assignments
-        return self._old_import, self._other_assignments
+                                kept = True
+                        else:
+                            kept = True
+
+                    if replaced and not kept:
+                        self._unused_names.setdefault(
+                            assignment.node, set()
+                        ).add(assignment.name)
+
+        return self._replaced_imports
+
+    def _remove_unused_names(
+        self, original_node: ImportT, updated_node: ImportT
+    ) -> ImportT | None:
+        """
+        `updated_node` without the names that are no longer referenced once
+        the references to the symbol are replaced, or None if no name is
+        left.
+        """
+        unused_names = self._unused_names.get(original_node)
+        names = updated_node.names
+        if unused_names is None or isinstance(names, cst.ImportStar):
+            return updated_node
+        names_to_keep = [
+            name.with_changes(comma=cst.MaybeSentinel.DEFAULT)
+            for name in names
+            if imported_name(name) not in unused_names
+        ]
+        if not len(names_to_keep):
+            return None
+        return updated_node.with_changes(names=names_to_keep)
 
     def leave_SimpleStatementLine(
         self,
@@ -350,15 +473,16 @@ class ReplaceImport(cst.CSTTransformer):
     ) -> (
         cst.SimpleStatementLine | cst.FlattenSentinel[cst.SimpleStatementLine]
     ):
+        self._get_replaced_imports()
         bodies: list[list[cst.BaseSmallStatement]] = [[]]
         for orig_subnode, updated_subnode in zip(
             original_node.body, updated_node.body
         ):
+            new_import: Sequence[ImportT]
             if isinstance(updated_subnode, cst.Import) and isinstance(
                 orig_subnode, cst.Import
             ):
                 new_import = self.get_new_import(orig_subnode, updated_subnode)
-
             elif isinstance(updated_subnode, cst.ImportFrom) and isinstance(
                 orig_subnode, cst.ImportFrom
             ):
@@ -373,6 +497,7 @@ class ReplaceImport(cst.CSTTransformer):
                     bodies.append([])
                 bodies[k].append(new_import_node)
 
+        bodies = [body for body in bodies if len(body)]
         if len(bodies) == 1:
             return updated_node.with_changes(body=bodies[0])
         return cst.FlattenSentinel(
@@ -382,52 +507,53 @@ class ReplaceImport(cst.CSTTransformer):
     def get_new_import_from(
         self, original_node: cst.ImportFrom, updated_node: cst.ImportFrom
     ) -> list[cst.ImportFrom]:
-        old_import, other_assignments = self._get_old_import()
-        if old_import != original_node:
+        """
+        If `original_node` imports the symbol, the names of `original_node`
+        still used, if any, followed by the new import of the symbol.
+        """
+        if original_node not in self._get_replaced_imports():
             return [updated_node]
 
         new_import = self._get_new_import()
-        self.should_add_import = False
+        self._should_add_import = False
         self.did_update = True
 
-        if not other_assignments:
-            return [new_import]
-
         names = updated_node.names
         if isinstance(names, cst.ImportStar):
             return [new_import, updated_node]
 
-        new_names: list[cst.ImportAlias] = []
-        for name in names:  # type: ignore
-            assert isinstance(name, cst.ImportAlias)
-
-            if (
+        unused_names = self._unused_names.get(original_node, set())
+        new_names = [
+            name.with_changes(comma=cst.MaybeSentinel.DEFAULT)
+            for name in names
+            if imported_name(name) not in unused_names
+            and not (
                 isinstance(name.name, cst.Name)
                 and name.name.value == self._from[-1]
-            ):
-                continue
-            new_names.append(
-                name.with_changes(comma=cst.MaybeSentinel.DEFAULT)
             )
+        ]
         if not len(new_names):
-            raise ValueError(f"{other_assignments} -- {names}")
-
+            return [new_import]
         return [updated_node.with_changes(names=new_names), new_import]
 
     def get_new_import(
         self, original_node: cst.Import, updated_node: cst.Import
     ) -> list[ImportT]:
-        old_import, other_assignments = self._get_old_import()
-        if old_import != updated_node:
+        """
+        If `original_node` imports the module of the symbol, the new import
+        of the symbol, after `original_node` if the module is still used.
+        """
+        if original_node not in self._get_replaced_imports():
             return [updated_node]
 
         new_import = self._get_new_import()
-        self.should_add_import = False
+        self._should_add_import = False
         self.did_update = True
 
-        if not other_assignments:
+        remaining = self._remove_unused_names(original_node, updated_node)
+        if remaining is None:
             return [new_import]
-        return [updated_node, new_import]
+        return [remaining, new_import]
 
     def _get_new_import(self) -> cst.ImportFrom:
         symbol_name = self._to[-1]
@@ -442,7 +568,7 @@ class ReplaceImport(cst.CSTTransformer):
     def leave_Attribute(
         self, original_node: cst.Attribute, updated_node: cst.Attribute
     ) -> cst.Attribute | cst.Name:
-        self._get_old_import()
+        self._get_replaced_imports()
         if original_node in self._ref_replacements:
             return self._get_new_import_ref()
         return updated_node
@@ -450,7 +576,7 @@ class ReplaceImport(cst.CSTTransformer):
     def leave_Name(
         self, original_node: cst.Name, updated_node: cst.Name
     ) -> cst.Name:
-        self._get_old_import()
+        self._get_replaced_imports()
         if original_node in self._ref_replacements:
             return self._get_new_import_ref()
         return updated_node
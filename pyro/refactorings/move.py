@@ -1,4 +1,10 @@
-from collections.abc import Iterable
+import multiprocessing
+import os
+from bisect import bisect_right
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 
 import libcst as cst
@@ -7,24 +13,29 @@ from libcst.metadata import (
     Assignment,
     BuiltinScope,
     CodeRange,
-    ParentNodeProvider,
+    GlobalScope,
+    MetadataWrapper,
     PositionProvider,
     Scope,
     ScopeProvider,
 )
 from libcst.metadata.scope_provider import LocalScope
 
+from pyro.edits import EditSet
 from pyro.module import Module
 from pyro.project import Project
 from pyro.refactorings.imports import (
     AddImports,
-    GatherExportsVisitor,
     ImportT,
     RemoveUnusedImports,
     ReplaceImport,
+    find_imports_unused_after_removal,
     get_import,
     import_from_module_name,
+    is_referenced_outside,
+    may_reference,
 )
+from pyro.refactorings.results import stage_and_apply_edits
 
 SymbolT = cst.FunctionDef | cst.ClassDef
 
@@ -62,54 +73,111 @@ def remove_leading_lines(
     return node.with_changes(leading_lines=leading_lines)
 
 
-class RemoveSymbolAtLocation(cst.CSTTransformer):
+def get_symbol_name(
+    node: cst.BaseCompoundStatement | cst.SimpleStatementLine,
+) -> str | None:
+    """
+    Name of the symbol defined by a statement, if it can be moved.
+    """
+    if isinstance(node, (cst.FunctionDef, cst.ClassDef)):
+        return node.name.value
+    if not isinstance(node, cst.SimpleStatementLine) or len(node.body) != 1:
+        return None
+    statement = node.body[0]
+    if m.matches(
+        statement, m.Assign(targets=[m.AssignTarget(target=m.Name())])
+    ):
+        assign = cst.ensure_type(statement, cst.Assign)
+        return cst.ensure_type(assign.targets[0].target, cst.Name).value
+    if m.matches(statement, m.AnnAssign(target=m.Name())):
+        return cst.ensure_type(
+            cst.ensure_type(statement, cst.AnnAssign).target, cst.Name
+        ).value
+    return None
+
+
+@dataclass
+class RemovedSymbol:
+    node: SymbolT | cst.SimpleStatementLine
+    name: str
+    # Imports the symbol needs in its new module, by name.
+    requirements: dict[str, ImportT] = field(default_factory=dict)
+
+
+class RemoveSymbolsAtLocations(cst.CSTTransformer):
+    """
+    Removes the symbols found at each of the `(line, column)` locations in
+    a single pass. `removed` has an entry per location, which is None if
+    no symbol was found there.
+
+    The top-level statement enclosing each location is found by a binary
+    search over the line ranges of the module body, and only these
+    statements are visited: the symbol removed is the innermost function,
+    class or simple statement of the statement at the location.
+    """
+
     METADATA_DEPENDENCIES = (
         PositionProvider,
-        ParentNodeProvider,
         ScopeProvider,
     )
 
     def __init__(
         self,
         scopes: Iterable[Scope | None],
-        line_number: int,
-        col_offset: int,
+        locations: Sequence[tuple[int, int]],
         module_name: str,
     ) -> None:
-        self._line_number = line_number
-        self._col_offset = col_offset
+        self._locations = list(locations)
         self._module_name = module_name.split(".")
-        self.removed_symbol: SymbolT | cst.SimpleStatementLine | None = None
-        self.symbol_name: str | None = None
-        self.symbol_requirements: dict[str, ImportT] = {}
+        self.removed: list[RemovedSymbol | None] = [None] * len(locations)
         self._scopes = scopes
-        self._code_range: CodeRange | None = None
-
-    def _is_in_block(self, code_range: CodeRange | None):
-        if code_range is None:
+        # Symbol being visited, whose references are gathered.
+        self._current: RemovedSymbol | None = None
+        # Import nodes of the new tree, by node of the original tree. Only
+        # the imports of the visited statements are listed, the others are
+        # left untouched.
+        self.updated_imports: dict[ImportT, ImportT] = {}
+        # Top-level statements enclosing none of the locations.
+        self._skipped: set[cst.CSTNode] = set()
+
+    def _enclosing_statements(
+        self, body: Sequence[cst.CSTNode]
+    ) -> set[cst.CSTNode]:
+        # The statements of the body follow each other, so their start
+        # lines are sorted and their line ranges do not overlap.
+        code_ranges = [
+            self.get_metadata(PositionProvider, statement)
+            for statement in body
+        ]
+        starts = [code_range.start.line for code_range in code_ranges]
+        statements = set()
+        for line_number, _ in self._locations:
+            k = bisect_right(starts, line_number) - 1
+            if k >= 0 and code_ranges[k].end.line >= line_number:
+                statements.add(body[k])
+        return statements
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        if node in self._skipped:
             return False
+        return super().on_visit(node)
 
-        correct_line = (
-            code_range.start.line <= self._line_number <= code_range.end.line
-        )
-        correct_column = (
-            code_range.start.column
-            <= self._col_offset
-            <= code_range.end.column
-        )
-        return correct_line and correct_column
-
-    def _get_parent_annotation(
-        self, node: cst.CSTNode
-    ) -> cst.Annotation | None:
-        ref_parent = self.get_metadata(ParentNodeProvider, node)
-        assert isinstance(ref_parent, cst.CSTNode)
+    def visit_Module(self, node: cst.Module) -> bool:
+        enclosing = self._enclosing_statements(node.body)
+        self._skipped = {
+            statement for statement in node.body if statement not in enclosing
+        }
+        return True
 
-        if isinstance(ref_parent, cst.Module):
-            return None
-        if isinstance(ref_parent, cst.Annotation):
-            return ref_parent
-        return self._get_parent_annotation(ref_parent)
+    def _matching_locations(self, code_range: CodeRange | None) -> list[int]:
+        if code_range is None:
+            return []
+        return [
+            k
+            for k, (line_number, col_offset) in enumerate(self._locations)
+            if code_range.start.line <= line_number <= code_range.end.line
+            and code_range.start.column <= col_offset <= code_range.end.column
+        ]
 
     def _node_requirements(
         self,
@@ -166,10 +234,9 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
 
     def visit_symbol(self, node: SymbolT) -> bool:
         code_range = self.get_metadata(PositionProvider, node, None)
-        if self._is_in_block(code_range):
-            self._code_range = code_range
-            self.removed_symbol = node
-            self.symbol_name = node.name.value
+        for k in self._matching_locations(code_range):
+            symbol = RemovedSymbol(node, node.name.value)
+            self._current = self.removed[k] = symbol
             parent_scope = _get_symbol_scope(node, self._scopes)
             if parent_scope is not None:
                 for scope in self._scopes:
@@ -177,7 +244,7 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
                         parent_scope, scope
                     ):
                         continue
-                    self.symbol_requirements.update(
+                    symbol.requirements.update(
                         self._node_requirements(parent_scope, scope)
                     )
         return True
@@ -192,31 +259,11 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
         self, node: cst.SimpleStatementLine
     ) -> bool | None:
         code_range = self.get_metadata(PositionProvider, node, None)
-        if self._is_in_block(code_range):
-            self._code_range = code_range
-            if m.matches(
-                node,
-                m.SimpleStatementLine(
-                    body=[m.Assign(targets=[m.AssignTarget(target=m.Name())])]
-                ),
-            ):
-                assign = cst.ensure_type(node.body[0], cst.Assign)
-                symbol_name = cst.ensure_type(
-                    assign.targets[0].target,
-                    cst.Name,
-                ).value
-            elif m.matches(
-                node,
-                m.SimpleStatementLine(body=[m.AnnAssign(target=m.Name())]),
-            ):
-                symbol_name = cst.ensure_type(
-                    cst.ensure_type(node.body[0], cst.AnnAssign).target,
-                    cst.Name,
-                ).value
-            else:
+        for k in self._matching_locations(code_range):
+            symbol_name = get_symbol_name(node)
+            if symbol_name is None:
                 raise ValueError("This cannot be extracted.")
-            self.removed_symbol = node
-            self.symbol_name = symbol_name
+            self._current = self.removed[k] = RemovedSymbol(node, symbol_name)
         return True
 
     def look_for_inline_referent(
@@ -226,7 +273,7 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
         | cst.SimpleString
         | cst.ConcatenatedString,
     ) -> bool:
-        if self._code_range is None:
+        if self._current is None:
             return True
 
         scope = self._get_scope(node)
@@ -234,14 +281,14 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
             return True
 
         requirements = self._node_requirements(scope, scope, node)
-        self.symbol_requirements.update(requirements)
+        self._current.requirements.update(requirements)
         return True
 
     def visit_Attribute(self, node: cst.Attribute) -> bool:
         return self.look_for_inline_referent(node)
 
     def visit_Name(self, node: cst.Name) -> bool:
-        if node.value == self.symbol_name:
+        if self._current is not None and node.value == self._current.name:
             return True
         return self.look_for_inline_referent(node)
 
@@ -254,7 +301,7 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
         else:
             return True
 
-        if value == self.symbol_name:
+        if self._current is not None and value == self._current.name:
             return True
         return self.look_for_inline_referent(node.annotation)
 
@@ -267,9 +314,11 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
         | cst.SimpleStatementLine
         | cst.RemovalSentinel
     ):
-        if self.removed_symbol is original_node:
-            self._code_range = None
-            return cst.RemovalSentinel.REMOVE
+        for symbol in self.removed:
+            if symbol is not None and symbol.node is original_node:
+                if self._current is symbol:
+                    self._current = None
+                return cst.RemovalSentinel.REMOVE
         return updated_node
 
     def leave_FunctionDef(
@@ -301,6 +350,18 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
     ):
         return self.leave_symbol(original_node, updated_node)
 
+    def leave_Import(
+        self, original_node: cst.Import, updated_node: cst.Import
+    ) -> cst.Import:
+        self.updated_imports[original_node] = updated_node
+        return updated_node
+
+    def leave_ImportFrom(
+        self, original_node: cst.ImportFrom, updated_node: cst.ImportFrom
+    ) -> cst.ImportFrom:
+        self.updated_imports[original_node] = updated_node
+        return updated_node
+
     def leave_Module(
         self, _: cst.Module, updated_node: cst.Module
     ) -> cst.Module:
@@ -310,6 +371,32 @@ class RemoveSymbolAtLocation(cst.CSTTransformer):
         return updated_node.with_changes(body=new_body)
 
 
+class RemoveSymbolAtLocation(RemoveSymbolsAtLocations):
+    def __init__(
+        self,
+        scopes: Iterable[Scope | None],
+        line_number: int,
+        col_offset: int,
+        module_name: str,
+    ) -> None:
+        super().__init__(scopes, [(line_number, col_offset)], module_name)
+
+    @property
+    def removed_symbol(self) -> SymbolT | cst.SimpleStatementLine | None:
+        symbol = self.removed[0]
+        return None if symbol is None else symbol.node
+
+    @property
+    def symbol_name(self) -> str | None:
+        symbol = self.removed[0]
+        return None if symbol is None else symbol.name
+
+    @property
+    def symbol_requirements(self) -> dict[str, ImportT]:
+        symbol = self.removed[0]
+        return {} if symbol is None else symbol.requirements
+
+
 class InsertSymbolEnd(cst.CSTTransformer):
     def __init__(
         self,
@@ -365,21 +452,287 @@ class InsertSymbolEnd(cst.CSTTransformer):
         )
 
 
-def move(
+def _get_symbol_range(
+    node: SymbolT | cst.SimpleStatementLine,
+    positions: Mapping[cst.CSTNode, CodeRange],
+) -> CodeRange:
+    """
+    Code removed with a symbol. Unlike its position, which starts at `def` or
+    `class`, it includes the decorators of the symbol.
+    """
+    code_range = positions[node]
+    if isinstance(node, (cst.FunctionDef, cst.ClassDef)) and len(
+        node.decorators
+    ):
+        return CodeRange(positions[node.decorators[0]].start, code_range.end)
+    return code_range
+
+
+def update_start_imports(
+    project: Project,
+    module_name: str,
+    module: Module,
+    wrapper: MetadataWrapper,
+    symbol_remover: RemoveSymbolsAtLocations,
+    destinations: dict[str, str],
+    exports: set[str],
+    clean_all_imports: bool = False,
+) -> None:
+    """
+    Updates the imports of `module` once `symbol_remover` removed symbols
+    from it: the symbols still used in the module are imported from their
+    destination, and the imports only used by the removed symbols are
+    removed. This is decided from the scopes of `wrapper`, resolved before
+    the removal.
+
+    With `clean_all_imports`, the scopes of the module are resolved again
+    to remove every unused import instead, even the ones unrelated to the
+    removed symbols.
+    """
+    new_imports = {
+        name: import_from_module_name(
+            module_name_end.split("."),
+            names=[cst.ImportAlias(name=cst.Name(value=name))],
+        )
+        for name, module_name_end in destinations.items()
+    }
+    if clean_all_imports:
+        module.visit(AddImports(list(new_imports.values())))
+        wrapper = project.new_metadata_wrapper(module.tree)
+        with project.timed("scopes", module_name):
+            scopes = set(wrapper.resolve(ScopeProvider).values())
+        module.visit_with_metadata(
+            wrapper, RemoveUnusedImports(scopes, exports)
+        )
+        return
+
+    scopes = set(wrapper.resolve(ScopeProvider).values())
+    positions = wrapper.resolve(PositionProvider)
+    removed_ranges = [
+        _get_symbol_range(symbol.node, positions)
+        for symbol in symbol_remover.removed
+        if symbol is not None
+    ]
+    unused_imports = find_imports_unused_after_removal(
+        scopes, positions, removed_ranges, exports
+    )
+    module.visit(
+        RemoveUnusedImports.from_unused_imports(
+            {
+                symbol_remover.updated_imports.get(node, node): names
+                for node, names in unused_imports.items()
+            }
+        )
+    )
+
+    global_scope = next(
+        scope for scope in scopes if isinstance(scope, GlobalScope)
+    )
+    module.visit(
+        AddImports(
+            [
+                import_node
+                for name, import_node in new_imports.items()
+                if name in exports
+                or any(
+                    is_referenced_outside(assignment, positions, removed_ranges)
+                    for assignment in global_scope[name]
+                )
+            ]
+        )
+    )
+
+
+def replace_symbol_import(
+    project: Project,
+    module_name: str,
+    module: Module,
+    module_from: Sequence[str],
+    module_to: Sequence[str],
+    clean_all_imports: bool = False,
+) -> bool:
+    """
+    Makes `module` import the symbol `module_from` from its new location
+    `module_to`. Returns whether the module was changed.
+
+    The imports of the symbol left unused are removed, and with
+    `clean_all_imports`, every unused import of the module too, at the cost
+    of resolving its scopes again.
+    """
+    exports = project.get_exports(module_name, module)
+
+    wrapper = project.get_metadata_wrapper(module_name, module)
+    with project.timed("scopes", module_name):
+        scopes = set(wrapper.resolve(ScopeProvider).values())
+    replacer = ReplaceImport(scopes, module_from, module_to, exports)
+    module.visit_with_metadata(wrapper, replacer)
+
+    if replacer.did_update:
+        project.counters["importsUpdated"] += 1
+    if replacer.did_update and clean_all_imports:
+        wrapper = project.new_metadata_wrapper(module.tree)
+        with project.timed("scopes", module_name):
+            scopes = set(wrapper.resolve(ScopeProvider).values())
+        module.visit_with_metadata(
+            wrapper, RemoveUnusedImports(scopes, exports)
+        )
+    return replacer.did_update
+
+
+# Below this number of modules, starting worker processes costs more than
+# it saves.
+PARALLEL_MIN_MODULES = 32
+# Workers are not forked: the daemon runs refactorings from threads, and
+# forking a multi-threaded process can deadlock. They rebuild their project
+# from its root anyway.
+WORKER_START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+_worker_projects: dict[tuple[Path, Path | None], Project] = {}
+
+# Symbol to import from its new location: (module_from, module_to), both
+# ending with the name of the symbol.
+ImportReplacement = tuple[Sequence[str], Sequence[str]]
+
+
+def replace_symbols_import(
+    project: Project,
+    module_name: str,
+    module: Module,
+    replacements: Sequence[ImportReplacement],
+    clean_all_imports: bool = False,
+) -> bool:
+    """
+    Runs `replace_symbol_import` for each replacement whose symbol the
+    module may reference. Returns whether the module was changed.
+    """
+    content = project.get_module_bytes(module_name)
+    did_update = False
+    for module_from, module_to in replacements:
+        if not may_reference(module_from[:-1], module_from[-1])(content):
+            continue
+        if replace_symbol_import(
+            project,
+            module_name,
+            module,
+            module_from,
+            module_to,
+            clean_all_imports,
+        ):
+            did_update = True
+    return did_update
+
+
+def _replace_symbols_import_worker(
+    args: tuple[Path, Path | None, str, list[ImportReplacement], bool]
+) -> tuple[str | None, dict[str, int]]:
+    """
+    Returns the new content of the module, if it changed, and the counters
+    of the work done on it.
+    """
+    root, cache_dir, module_name, replacements, clean_all_imports = args
+    key = (root, cache_dir)
+    if key not in _worker_projects:
+        _worker_projects[key] = Project(root, cache_dir=cache_dir)
+    project = _worker_projects[key]
+    project.counters.clear()
+    module = project.get_module(module_name)
+    content = None
+    if replace_symbols_import(
+        project, module_name, module, replacements, clean_all_imports
+    ):
+        content = module.get_content()
+    return content, dict(project.counters)
+
+
+def replace_symbols_imports(
+    project: Project,
+    module_names: Sequence[str],
+    replacements: Sequence[ImportReplacement],
+    jobs: int = 1,
+    clean_all_imports: bool = False,
+) -> list[tuple[str, str]]:
+    """
+    Runs `replace_symbols_import` on the given modules, in `jobs` worker
+    processes if there are enough of them, and returns the new content of
+    the modules that changed, in the order of `module_names`. Each module
+    is parsed once, whatever the number of replacements.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    # Workers read the files, they would not see the overlays.
+    if (
+        jobs == 1
+        or len(module_names) < PARALLEL_MIN_MODULES
+        or len(project.overlays)
+    ):
+        new_contents: list[tuple[str, str]] = []
+        for module_name, module in project.walk_modules(module_names):
+            with project.timed("transform", module_name):
+                did_update = replace_symbols_import(
+                    project,
+                    module_name,
+                    module,
+                    replacements,
+                    clean_all_imports,
+                )
+            if did_update:
+                new_contents.append((module_name, module.get_content()))
+        return new_contents
+
+    cache_dir = None
+    if project.parse_cache is not None:
+        cache_dir = project.parse_cache.root
+    task_replacements = [
+        (list(module_from), list(module_to))
+        for module_from, module_to in replacements
+    ]
+    tasks = [
+        (project.root, cache_dir, name, task_replacements, clean_all_imports)
+        for name in module_names
+    ]
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+    ) as executor:
+        results = executor.map(
+            _replace_symbols_import_worker,
+            tasks,
+            chunksize=max(1, len(tasks) // (jobs * 4)),
+        )
+        new_contents = []
+        for name, (content, counters) in zip(module_names, results):
+            project.counters.update(counters)
+            if content is not None:
+                new_contents.append((name, content))
+        return new_contents
+
+
+def stage_move(
     project: Project,
     module_name_start: str,
     line_number: int,
     column_offset: int,
     module_name_end: str,
-) -> dict[str, Any]:
+    jobs: int = 1,
+    clean_all_imports: bool = False,
+) -> tuple[EditSet, str]:
+    """
+    Computes the edits of `move` without writing them. Returns them along
+    with a description of the refactoring.
+    """
     module_start = project.get_module(module_name_start)
     module_end = project.get_module(module_name_end)
 
-    export_gatherer = GatherExportsVisitor()
-    module_start.visit(export_gatherer)
+    exports = project.get_exports(module_name_start, module_start)
 
-    wrapper = cst.MetadataWrapper(module_start.tree)
-    scopes = set(wrapper.resolve(ScopeProvider).values())
+    wrapper = project.get_metadata_wrapper(module_name_start, module_start)
+    with project.timed("scopes", module_name_start):
+        scopes = set(wrapper.resolve(ScopeProvider).values())
     symbol_remover = RemoveSymbolAtLocation(
         scopes, line_number, column_offset, module_name_start
     )
@@ -392,26 +745,15 @@ def move(
             f"No symbol found at location L{line_number} C{column_offset}"
         )
 
-    module_start.visit(
-        AddImports(
-            [
-                import_from_module_name(
-                    module_name_end.split("."),
-                    names=[
-                        cst.ImportAlias(
-                            name=cst.Name(value=symbol_remover.symbol_name),
-                        )
-                    ],
-                )
-            ]
-        )
-    )
-
-    wrapper = cst.MetadataWrapper(module_start.tree)
-    scopes = set(wrapper.resolve(ScopeProvider).values())
-    module_start.visit_with_metadata(
+    update_start_imports(
+        project,
+        module_name_start,
+        module_start,
         wrapper,
-        RemoveUnusedImports(scopes, export_gatherer.explicit_exported_objects),
+        symbol_remover,
+        {symbol_remover.symbol_name: module_name_end},
+        exports,
+        clean_all_imports,
     )
 
     module_end.visit(
@@ -419,45 +761,118 @@ def move(
     )
     module_end.visit(InsertSymbolEnd(symbol_remover.removed_symbol))
 
-    modules_to_save: list[tuple[str, Module]] = [
-        (module_name_start, module_start),
-        (module_name_end, module_end),
+    contents_to_save: list[tuple[str, str]] = [
+        (module_name_start, module_start.get_content()),
+        (module_name_end, module_end.get_content()),
     ]
 
-    for module_name, module in project.walk_modules():
-        if module_name == module_name_start or module_name == module_name_end:
-            continue
+    importers = [
+        name
+        for name in project.get_importers(module_name_start)
+        if name != module_name_end
+    ]
+    prefilter = may_reference(
+        module_name_start.split("."), symbol_remover.symbol_name
+    )
+    candidates = list(project.filter_modules(importers, prefilter))
+    contents_to_save.extend(
+        replace_symbols_imports(
+            project,
+            candidates,
+            [
+                (
+                    module_name_start.split(".")
+                    + [symbol_remover.symbol_name],
+                    module_name_end.split(".") + [symbol_remover.symbol_name],
+                )
+            ],
+            jobs,
+            clean_all_imports,
+        )
+    )
 
-        export_gatherer = GatherExportsVisitor()
-        module.visit(export_gatherer)
+    edits = EditSet()
+    for module_name, content in contents_to_save:
+        project.stage_module_content(edits, module_name, content)
 
-        wrapper = cst.MetadataWrapper(module.tree)
-        scopes = set(wrapper.resolve(ScopeProvider).values())
-        replacer = ReplaceImport(
-            scopes,
-            module_name_start.split(".") + [symbol_remover.symbol_name],
-            module_name_end.split(".") + [symbol_remover.symbol_name],
-            export_gatherer.explicit_exported_objects,
-        )
-        module.visit_with_metadata(wrapper, replacer)
+    description = (
+        f"move {module_name_start}:{symbol_remover.symbol_name}"
+        f" to {module_name_end}"
+    )
+    return edits, description
 
-        if replacer.did_update:
-            wrapper = cst.MetadataWrapper(module.tree)
-            scopes = set(wrapper.resolve(ScopeProvider).values())
-            module.visit_with_metadata(
-                wrapper,
-                RemoveUnusedImports(
-                    scopes, export_gatherer.explicit_exported_objects
-                ),
-            )
 
-            modules_to_save.append((module_name, module))
+def move(
+    project: Project,
+    module_name_start: str,
+    line_number: int,
+    column_offset: int,
+    module_name_end: str,
+    jobs: int = 1,
+    fsync: bool = False,
+    dry_run: bool = False,
+    timings: bool = False,
+    clean_all_imports: bool = False,
+) -> dict[str, Any]:
+    """
+    Moves the symbol at `line_number`, `column_offset` in `module_name_start`
+    to the end of `module_name_end`, and updates the imports of the rest of
+    the project. With `jobs` other than 1, the modules importing the symbol
+    are rewritten in that many processes (0 uses all CPUs).
+
+    All the edited modules are written together once the analysis is done,
+    and restored if writing one of them fails. With `dry_run`, nothing is
+    written and the diff of each file is returned instead. With `timings`,
+    the output also gives the time spent in each phase of the refactoring.
+
+    Only the imports made unused by the move are removed, unless
+    `clean_all_imports`, which removes all the unused imports of the edited
+    modules at the cost of analyzing them twice.
+    """
+    return stage_and_apply_edits(
+        project,
+        lambda: stage_move(
+            project,
+            module_name_start,
+            line_number,
+            column_offset,
+            module_name_end,
+            jobs,
+            clean_all_imports,
+        ),
+        dry_run=dry_run,
+        fsync=fsync,
+        timings=timings,
+    )
 
-    edited_files: list[dict[str, Any]] = []
-    for module_name, mod in modules_to_save:
-        project.save_module(module_name, mod)
-        edited_files.append(
-            {"filename": f"{module_name.replace('.', '/')}.py", "location": 0}
-        )
 
-    return {"success": True, "editedFiles": edited_files}
+def move_symbol(
+    project: Project,
+    module_name_start: str,
+    symbol_name: str,
+    module_name_end: str,
+    jobs: int = 1,
+    fsync: bool = False,
+    dry_run: bool = False,
+    timings: bool = False,
+    clean_all_imports: bool = False,
+) -> dict[str, Any]:
+    """
+    Same as `move`, for the top-level symbol named `symbol_name`. Its
+    location is found in the definitions index of the project, without
+    analyzing the module beforehand.
+    """
+    definition = project.find_definition(module_name_start, symbol_name)
+    line_number, column_offset = definition.start
+    return move(
+        project,
+        module_name_start,
+        line_number,
+        column_offset,
+        module_name_end,
+        jobs=jobs,
+        fsync=fsync,
+        dry_run=dry_run,
+        timings=timings,
+        clean_all_imports=clean_all_imports,
+    )
@@ -4,9 +4,15 @@ from typing import Any
 import libcst as cst
 from libcst.metadata import Assignment, GlobalScope, Scope, ScopeProvider
 
+from pyro.edits import EditSet
 from pyro.module import Module
 from pyro.project import Project
-from pyro.refactorings.imports import is_import_of_module, sequence_from_attr
+from pyro.refactorings.imports import (
+    is_import_of_module,
+    may_reference,
+    sequence_from_attr,
+)
+from pyro.refactorings.results import stage_and_apply_edits
 
 
 class ReorderFuncDefArgs(cst.CSTTransformer):
@@ -14,6 +20,7 @@ class ReorderFuncDefArgs(cst.CSTTransformer):
         self.func_name = func_name
         self.new_order = new_order
         self.order: list[int] = []
+        self.did_update = False
 
     def leave_FunctionDef(
         self, original_node: cst.FunctionDef, updated_node: cst.FunctionDef
@@ -56,6 +63,7 @@ class ReorderFuncDefArgs(cst.CSTTransformer):
                     self.order.append(order - 1)
                 else:
                     self.order.append(order)
+            self.did_update = True
             return updated_node.with_changes(
                 params=updated_node.params.with_changes(
                     params=generic_params, posonly_params=posonly_params
@@ -84,6 +92,7 @@ class ReorderFuncCallArgs(cst.CSTTransformer):
         self._scopes = scopes
         self.module_name = module_name
         self.new_order = new_order
+        self.did_update = False
 
     def leave_Call(
         self, original_node: cst.Call, updated_node: cst.Call
@@ -106,38 +115,72 @@ class ReorderFuncCallArgs(cst.CSTTransformer):
                                 new_args = reorder_args(
                                     updated_node.args, self.new_order
                                 )
+                                self.did_update = True
                                 return updated_node.with_changes(args=new_args)
         return updated_node
 
 
-def reorder_func_arg(
+def stage_reorder_func_arg(
     project: Project,
     source_mod_name: str,
     func_name: str,
     new_order: Sequence[int],
-) -> dict[str, Any]:
+) -> tuple[EditSet, str]:
+    """
+    Computes the edits of `reorder_func_arg` without writing them. Returns
+    them along with a description of the refactoring.
+    """
     source_mod = project.get_module(source_mod_name)
 
     func_reorderer = ReorderFuncDefArgs(func_name, new_order)
     source_mod.visit(func_reorderer)
 
-    modules_to_save: list[tuple[str, Module]] = [(source_mod_name, source_mod)]
-
-    for module_name, module in project.walk_modules():
-        if module_name == source_mod_name:
-            continue
+    modules_to_save: list[tuple[str, Module]] = []
+    if func_reorderer.did_update and source_mod.is_modified():
+        modules_to_save.append((source_mod_name, source_mod))
 
-        wrapper = cst.MetadataWrapper(module.tree)
-        scopes = set(wrapper.resolve(ScopeProvider).values())
+    importers = project.get_importers(source_mod_name)
+    prefilter = may_reference(source_mod_name.split("."), func_name)
+    for module_name, module in project.walk_modules(importers, prefilter):
+        wrapper = project.get_metadata_wrapper(module_name, module)
+        with project.timed("scopes", module_name):
+            scopes = set(wrapper.resolve(ScopeProvider).values())
         reorderer = ReorderFuncCallArgs(
             scopes,
             source_mod_name.split(".") + [func_name],
             func_reorderer.order,
         )
-        module.visit_with_metadata(wrapper, reorderer)
-        modules_to_save.append((module_name, module))
+        with project.timed("transform", module_name):
+            module.visit_with_metadata(wrapper, reorderer)
+        if reorderer.did_update and module.is_modified():
+            modules_to_save.append((module_name, module))
 
+    edits = EditSet()
     for mod_name, mod in modules_to_save:
-        project.save_module(mod_name, mod)
+        project.stage_module_content(edits, mod_name, mod.get_content())
 
-    return {"success": True}
+    description = (
+        f"reorder arguments of {source_mod_name}:{func_name}"
+        f" to {list(new_order)}"
+    )
+    return edits, description
+
+
+def reorder_func_arg(
+    project: Project,
+    source_mod_name: str,
+    func_name: str,
+    new_order: Sequence[int],
+    fsync: bool = False,
+    dry_run: bool = False,
+    timings: bool = False,
+) -> dict[str, Any]:
+    return stage_and_apply_edits(
+        project,
+        lambda: stage_reorder_func_arg(
+            project, source_mod_name, func_name, new_order
+        ),
+        dry_run=dry_run,
+        fsync=fsync,
+        timings=timings,
+    )
@@ -0,0 +1,72 @@
+from collections.abc import Callable
+from typing import Any
+
+from pyro.edits import EditSet
+from pyro.project import COUNTERS, Project
+from pyro.timings import collect_timings
+
+
+def apply_edits(
+    project: Project,
+    edits: EditSet,
+    description: str,
+    dry_run: bool = False,
+    fsync: bool = False,
+) -> dict[str, Any]:
+    """
+    Commits `edits` and returns the output of a refactoring. With `dry_run`,
+    nothing is written and the unified diff of each file is returned
+    instead. Otherwise the refactoring is recorded in the journal of the
+    project, if it has one, so that it can be undone.
+    """
+    edited_files: list[dict[str, Any]] = []
+    if dry_run:
+        for edit in edits:
+            filename = edit.location.relative_to(project.root).as_posix()
+            edited_files.append(
+                {
+                    "filename": filename,
+                    "location": 0,
+                    "diff": edit.diff(filename),
+                }
+            )
+        return {"success": True, "dryRun": True, "editedFiles": edited_files}
+
+    module_names = project.commit(edits, fsync=fsync)
+    if project.journal is not None:
+        project.journal.record(project.root, description, edits)
+
+    for module_name in module_names:
+        edited_files.append(
+            {"filename": f"{module_name.replace('.', '/')}.py", "location": 0}
+        )
+    return {"success": True, "editedFiles": edited_files}
+
+
+def stage_and_apply_edits(
+    project: Project,
+    stage: Callable[[], tuple[EditSet, str]],
+    dry_run: bool = False,
+    fsync: bool = False,
+    timings: bool = False,
+) -> dict[str, Any]:
+    """
+    Runs `stage` to compute the edits of a refactoring, then applies them
+    with `apply_edits`. The work done is counted in the output, under
+    "counters". With `timings`, the time spent in each phase is added to
+    the output too, under "timings".
+    """
+    counters = project.counters.copy()
+    with collect_timings(project, timings) as collected:
+        # Time not spent in a more specific phase goes to the transformers.
+        with project.timed("transform"):
+            edits, description = stage()
+        outputs = apply_edits(
+            project, edits, description, dry_run=dry_run, fsync=fsync
+        )
+    outputs["counters"] = {
+        name: project.counters[name] - counters[name] for name in COUNTERS
+    }
+    if collected is not None:
+        outputs["timings"] = collected.to_dict()
+    return outputs
@@ -0,0 +1,212 @@
+from collections.abc import Sequence
+from typing import Any
+
+from libcst.metadata import ScopeProvider
+
+from pyro.edits import EditSet
+from pyro.project import Project
+from pyro.refactorings.imports import (
+    AddImports,
+    ImportT,
+    get_import,
+    may_reference,
+)
+from pyro.refactorings.move import (
+    ImportReplacement,
+    InsertSymbolEnd,
+    RemovedSymbol,
+    RemoveSymbolsAtLocations,
+    replace_symbols_import,
+    replace_symbols_imports,
+    update_start_imports,
+)
+from pyro.refactorings.results import stage_and_apply_edits
+
+# A symbol given by its name, or by the (line, column) of its definition.
+SymbolLocation = str | tuple[int, int]
+
+
+def _requirements(
+    module_name_start: str,
+    module_name_end: str,
+    symbols: Sequence[RemovedSymbol],
+    destinations: dict[str, str],
+) -> list[ImportT]:
+    """
+    Imports needed by the symbols moved to `module_name_end`. Symbols
+    moved along with them are imported from their new module, or not at
+    all if it is `module_name_end`.
+    """
+    requirements: dict[str, ImportT] = {}
+    for symbol in symbols:
+        requirements.update(symbol.requirements)
+
+    imports: list[ImportT] = []
+    for name, import_node in requirements.items():
+        if name in destinations and import_node.deep_equals(
+            get_import(module_name_start.split("."), name)
+        ):
+            if destinations[name] == module_name_end:
+                continue
+            import_node = get_import(destinations[name].split("."), name)
+        imports.append(import_node)
+    return imports
+
+
+def stage_split_module(
+    project: Project,
+    module_name_start: str,
+    moves: Sequence[tuple[SymbolLocation, str]],
+    jobs: int = 1,
+    clean_all_imports: bool = False,
+) -> tuple[EditSet, str]:
+    """
+    Computes the edits of `split_module` without writing them. Returns them
+    along with a description of the refactoring.
+    """
+    module_start = project.get_module(module_name_start)
+    exports = project.get_exports(module_name_start, module_start)
+
+    wrapper = project.get_metadata_wrapper(module_name_start, module_start)
+    locations: list[tuple[int, int]] = []
+    for location, module_name_end in moves:
+        if module_name_end == module_name_start:
+            raise ValueError(f"Cannot move a symbol to {module_name_start}.")
+        if isinstance(location, str):
+            location = project.find_definition(
+                module_name_start, location
+            ).start
+        locations.append((location[0], location[1]))
+
+    with project.timed("scopes", module_name_start):
+        scopes = set(wrapper.resolve(ScopeProvider).values())
+    symbol_remover = RemoveSymbolsAtLocations(
+        scopes, locations, module_name_start
+    )
+    module_start.visit_with_metadata(wrapper, symbol_remover)
+
+    # Destination of each moved symbol, and moved symbols by destination.
+    destinations: dict[str, str] = {}
+    symbols_by_module: dict[str, list[RemovedSymbol]] = {}
+    for (line_number, column_offset), symbol, (_, module_name_end) in zip(
+        locations, symbol_remover.removed, moves
+    ):
+        if symbol is None:
+            raise Exception(
+                f"No symbol found at location L{line_number} C{column_offset}"
+            )
+        if symbol.name in destinations:
+            raise ValueError(f"{symbol.name} is moved more than once.")
+        destinations[symbol.name] = module_name_end
+        symbols_by_module.setdefault(module_name_end, []).append(symbol)
+
+    update_start_imports(
+        project,
+        module_name_start,
+        module_start,
+        wrapper,
+        symbol_remover,
+        destinations,
+        exports,
+        clean_all_imports,
+    )
+
+    replacements: list[ImportReplacement] = [
+        (
+            module_name_start.split(".") + [name],
+            module_name_end.split(".") + [name],
+        )
+        for name, module_name_end in destinations.items()
+    ]
+
+    contents_to_save: list[tuple[str, str]] = [
+        (module_name_start, module_start.get_content())
+    ]
+    for module_name_end, symbols in symbols_by_module.items():
+        module_end = project.get_module(module_name_end)
+        # Destinations may themselves import symbols moved elsewhere.
+        replace_symbols_import(
+            project,
+            module_name_end,
+            module_end,
+            [
+                (module_from, module_to)
+                for module_from, module_to in replacements
+                if destinations[module_from[-1]] != module_name_end
+            ],
+            clean_all_imports,
+        )
+        module_end.visit(
+            AddImports(
+                _requirements(
+                    module_name_start, module_name_end, symbols, destinations
+                )
+            )
+        )
+        for symbol in symbols:
+            module_end.visit(InsertSymbolEnd(symbol.node))
+        contents_to_save.append((module_name_end, module_end.get_content()))
+
+    importers = [
+        name
+        for name in project.get_importers(module_name_start)
+        if name not in symbols_by_module
+    ]
+    prefilters = [
+        may_reference(module_name_start.split("."), name)
+        for name in destinations
+    ]
+    candidates = list(
+        project.filter_modules(
+            importers,
+            lambda content: any(
+                prefilter(content) for prefilter in prefilters
+            ),
+        )
+    )
+    contents_to_save.extend(
+        replace_symbols_imports(
+            project, candidates, replacements, jobs, clean_all_imports
+        )
+    )
+
+    edits = EditSet()
+    for module_name, content in contents_to_save:
+        project.stage_module_content(edits, module_name, content)
+
+    description = (
+        f"split {module_name_start}: move {', '.join(destinations)}"
+        f" to {', '.join(symbols_by_module)}"
+    )
+    return edits, description
+
+
+def split_module(
+    project: Project,
+    module_name_start: str,
+    moves: Sequence[tuple[SymbolLocation, str]],
+    jobs: int = 1,
+    fsync: bool = False,
+    dry_run: bool = False,
+    timings: bool = False,
+    clean_all_imports: bool = False,
+) -> dict[str, Any]:
+    """
+    Moves several symbols out of `module_name_start` at once. `moves` pairs
+    each symbol, given by its name or the `(line, column)` of its
+    definition, with the module it is moved to.
+
+    Unlike calling `move` for each symbol, the module is analyzed once, the
+    project is scanned once for the modules importing any of the symbols,
+    and every edited module is parsed and formatted once. Unused imports
+    are removed as in `move`.
+    """
+    return stage_and_apply_edits(
+        project,
+        lambda: stage_split_module(
+            project, module_name_start, moves, jobs, clean_all_imports
+        ),
+        dry_run=dry_run,
+        fsync=fsync,
+        timings=timings,
+    )
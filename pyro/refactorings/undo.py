@@ -0,0 +1,38 @@
+from typing import Any
+
+from pyro.journal import JournalError
+from pyro.project import Project
+
+
+def undo(project: Project, steps: int = 1) -> dict[str, Any]:
+    """
+    Reverts the last `steps` refactorings recorded in the journal of the
+    project, most recent first. Files are restored from the diffs in the
+    journal, without parsing anything.
+    """
+    if project.journal is None:
+        raise JournalError("The project has no journal.")
+
+    undone: list[str] = []
+    edited_files: list[dict[str, Any]] = []
+    for _ in range(steps):
+        reverted = project.journal.undo(project.root)
+        if reverted is None:
+            break
+        description, edits, created = reverted
+        module_names = project.commit(edits)
+        for location in created:
+            module_names.append(project.get_module_name(location))
+            location.unlink()
+            project.module_cache.invalidate(module_names[-1])
+        project.journal.pop()
+
+        undone.append(description)
+        for module_name in module_names:
+            edited_files.append(
+                {
+                    "filename": f"{module_name.replace('.', '/')}.py",
+                    "location": 0,
+                }
+            )
+    return {"success": True, "undone": undone, "editedFiles": edited_files}
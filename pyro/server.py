@@ -0,0 +1,198 @@
+import json
+import os
+import socketserver
+import threading
+import traceback
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TextIO
+
+from pyro import client
+from pyro.project import Project
+from pyro.refactorings.move import move, move_symbol
+from pyro.refactorings.reorder_func_args import reorder_func_arg
+from pyro.refactorings.split import split_module
+from pyro.refactorings.undo import undo
+from pyro.version import __version__
+from pyro.watcher import Watcher
+
+
+class Server:
+    """
+    Long-running pyro process answering JSON requests, one per line:
+
+        {"id": 1, "command": "move", "args": {"module_start": "pkg.mod", ...}}
+
+    Responses carry the `id` of their request and the same fields as the
+    output of the corresponding CLI command. Projects are kept between
+    requests, so that their parsed modules and resolved metadata are
+    reused as long as the files do not change. With `watch`, the files of
+    the projects are watched so that only the modules that changed are
+    checked again by the next request.
+    """
+
+    def __init__(
+        self, root: Path, cache_dir: Path | None = None, watch: bool = False
+    ):
+        self.root = root.resolve()
+        self.cache_dir = cache_dir
+        self.watch = watch
+        self.running = True
+        self._projects: dict[Path, Project] = {}
+        self._watchers: list[Watcher] = []
+        self._lock = threading.Lock()
+        self._commands: dict[str, Callable[[dict[str, Any]], Any]] = {
+            "ping": self._ping,
+            "move": self._move,
+            "split": self._split,
+            "reorder": self._reorder,
+            "undo": self._undo,
+            "shutdown": self._shutdown,
+        }
+
+    def get_project(self, root: str | None = None) -> Project:
+        root_path = self.root if root is None else Path(root).resolve()
+        if root_path not in self._projects:
+            # Cache entries are namespaced by project root.
+            project = Project(root_path, cache_dir=self.cache_dir)
+            if self.watch:
+                self._watchers.append(Watcher(project).start())
+            self._projects[root_path] = project
+        return self._projects[root_path]
+
+    def close(self) -> None:
+        for watcher in self._watchers:
+            watcher.stop()
+        self._watchers = []
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        try:
+            command = self._commands.get(request.get("command", ""))
+            if command is None:
+                raise ValueError(f"Unknown command {request.get('command')}")
+            with self._lock:
+                response = command(dict(request.get("args", {})))
+        except Exception as e:
+            response = {
+                "success": False,
+                "errorMsg": str(e),
+                "trace": traceback.format_exc(),
+            }
+        response["id"] = request.get("id")
+        return response
+
+    def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object.")
+        except ValueError as e:
+            return json.dumps(
+                {"success": False, "errorMsg": f"Invalid request: {e}"}
+            )
+        return json.dumps(self.handle(request))
+
+    def _ping(self, _: dict[str, Any]) -> dict[str, Any]:
+        return {"success": True, "version": __version__, "pid": os.getpid()}
+
+    def _move(self, args: dict[str, Any]) -> dict[str, Any]:
+        project = self.get_project(args.pop("root", None))
+        options = {
+            "jobs": args.get("jobs", 1),
+            "dry_run": args.get("dry_run", False),
+            "timings": args.get("timings", False),
+            "clean_all_imports": args.get("clean_all_imports", False),
+        }
+        if "symbol" in args:
+            return move_symbol(
+                project,
+                args["module_start"],
+                args["symbol"],
+                args["module_end"],
+                **options,
+            )
+        return move(
+            project,
+            args["module_start"],
+            args["lineno"],
+            args["colno"],
+            args["module_end"],
+            **options,
+        )
+
+    def _split(self, args: dict[str, Any]) -> dict[str, Any]:
+        project = self.get_project(args.pop("root", None))
+        # Locations are sent as JSON arrays.
+        moves = [
+            (symbol if isinstance(symbol, str) else tuple(symbol), module_end)
+            for symbol, module_end in args["moves"]
+        ]
+        return split_module(
+            project,
+            args["module_start"],
+            moves,
+            jobs=args.get("jobs", 1),
+            dry_run=args.get("dry_run", False),
+            timings=args.get("timings", False),
+            clean_all_imports=args.get("clean_all_imports", False),
+        )
+
+    def _reorder(self, args: dict[str, Any]) -> dict[str, Any]:
+        project = self.get_project(args.pop("root", None))
+        return reorder_func_arg(
+            project,
+            args["module"],
+            args["func_name"],
+            args["new_order"],
+            dry_run=args.get("dry_run", False),
+            timings=args.get("timings", False),
+        )
+
+    def _undo(self, args: dict[str, Any]) -> dict[str, Any]:
+        project = self.get_project(args.pop("root", None))
+        return undo(project, args.get("steps", 1))
+
+    def _shutdown(self, _: dict[str, Any]) -> dict[str, Any]:
+        self.running = False
+        return {"success": True}
+
+    def serve_stream(self, reader: TextIO, writer: TextIO) -> None:
+        for line in reader:
+            if not line.strip():
+                continue
+            writer.write(self.handle_line(line) + "\n")
+            writer.flush()
+            if not self.running:
+                break
+
+    def serve_socket(self, socket_path: Path) -> None:
+        if client.request(socket_path, "ping", {}) is not None:
+            raise RuntimeError(
+                f"A daemon is already listening on {socket_path}"
+            )
+        socket_path.unlink(missing_ok=True)
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for raw_line in self.rfile:
+                    line = raw_line.decode()
+                    if not line.strip():
+                        continue
+                    response = server.handle_line(line) + "\n"
+                    self.wfile.write(response.encode())
+                    self.wfile.flush()
+                    if not server.running:
+                        threading.Thread(target=unix_server.shutdown).start()
+                        break
+
+        with socketserver.ThreadingUnixStreamServer(
+            str(socket_path), RequestHandler
+        ) as unix_server:
+            unix_server.daemon_threads = True
+            try:
+                unix_server.serve_forever()
+            finally:
+                socket_path.unlink(missing_ok=True)
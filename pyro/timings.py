@@ -0,0 +1,110 @@
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pyro.project import Project
+
+# Number of modules listed for each phase, the slowest first.
+DEFAULT_SLOWEST = 5
+
+
+@dataclass
+class PhaseTimes:
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+    # Wall time spent on each module.
+    modules: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self, slowest: int) -> dict[str, Any]:
+        modules = sorted(
+            self.modules.items(), key=lambda item: item[1], reverse=True
+        )
+        return {
+            "wall": round(self.wall, 6),
+            "cpu": round(self.cpu, 6),
+            "calls": self.calls,
+            "slowest": [
+                {"module": name, "wall": round(wall, 6)}
+                for name, wall in modules[:slowest]
+            ],
+        }
+
+
+class Timings:
+    """
+    Wall and CPU time spent in each phase of a refactoring, and the modules
+    on which each phase was the slowest.
+
+    Phases can be nested: the time of a nested phase is only counted in
+    that phase, so that the times of all phases add up to the time spent in
+    any of them.
+    """
+
+    def __init__(self, slowest: int = DEFAULT_SLOWEST):
+        self.slowest = slowest
+        self.phases: dict[str, PhaseTimes] = {}
+        # Time spent in the nested phases of each running phase.
+        self._nested: list[list[float]] = []
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    @contextmanager
+    def phase(
+        self, name: str, module: str | None = None
+    ) -> Generator[None, None, None]:
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        self._nested.append([0.0, 0.0])
+        try:
+            yield
+        finally:
+            nested_wall, nested_cpu = self._nested.pop()
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            if len(self._nested):
+                self._nested[-1][0] += wall
+                self._nested[-1][1] += cpu
+            self.add(name, wall - nested_wall, cpu - nested_cpu, module)
+
+    def add(
+        self, name: str, wall: float, cpu: float, module: str | None = None
+    ) -> None:
+        phase = self.phases.setdefault(name, PhaseTimes())
+        phase.wall += wall
+        phase.cpu += cpu
+        phase.calls += 1
+        if module is not None:
+            phase.modules[module] = phase.modules.get(module, 0.0) + wall
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "wall": round(time.perf_counter() - self._start_wall, 6),
+            "cpu": round(time.process_time() - self._start_cpu, 6),
+            "phases": {
+                name: phase.to_dict(self.slowest)
+                for name, phase in self.phases.items()
+            },
+        }
+
+
+@contextmanager
+def collect_timings(
+    project: "Project", enabled: bool = True
+) -> Generator[Timings | None, None, None]:
+    """
+    Records the timings of everything done on `project` in the block, if
+    `enabled`.
+    """
+    if not enabled:
+        yield None
+        return
+    previous = project.timings
+    project.timings = Timings()
+    try:
+        yield project.timings
+    finally:
+        project.timings = previous
@@ -1,3 +1,17 @@
-import importlib.metadata
+import functools
+from typing import Any
 
-__version__ = importlib.metadata.version("pyro")
+
+@functools.cache
+def get_version() -> str:
+    import importlib.metadata
+
+    return importlib.metadata.version("pyro")
+
+
+def __getattr__(name: str) -> Any:
+    # Reading the package metadata is slow, it is only done when the
+    # version is actually needed.
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,493 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
+
+from pyro.discovery import DEFAULT_EXCLUDED_DIRS, ROOT_EXCLUDED_DIRS
+
+if TYPE_CHECKING:
+    from pyro.project import Project
+
+# Time without events after which a burst of changes is considered over.
+DEFAULT_DEBOUNCE = 0.1
+# A burst is reported after this long even if changes keep coming.
+MAX_DEBOUNCE_DELAY = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+@dataclass
+class Changes:
+    # Modules whose content may have changed, relative to the root.
+    modified: set[str] = field(default_factory=set)
+    # Directories in which entries were added, removed or renamed.
+    directories: set[str] = field(default_factory=set)
+    # Events were lost, anything may have changed.
+    overflow: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.modified or self.directories or self.overflow)
+
+    def update(self, other: "Changes") -> None:
+        self.modified |= other.modified
+        self.directories |= other.directories
+        self.overflow = self.overflow or other.overflow
+
+
+def _is_watched_dir(name: str) -> bool:
+    return name not in DEFAULT_EXCLUDED_DIRS and not name.endswith(".egg-info")
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+class WatcherBackend(Protocol):
+    # Backends reporting changes late need a longer debounce.
+    min_debounce: float
+    # Whether `read(0)` reports every change made so far. Otherwise,
+    # changes are only found some time after they were made.
+    immediate: bool
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Waits at most `timeout` seconds for changes to be read. Returns
+        False on timeout.
+        """
+        ...
+
+    def read(self, timeout: float) -> Changes:
+        """
+        Waits at most `timeout` seconds for changes.
+        """
+        ...
+
+    def close(self) -> None:
+        """
+        Releases the resources of the backend.
+        """
+        ...
+
+
+# From <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """
+    Watches every directory of the project with inotify (Linux only).
+    """
+
+    min_debounce = 0.0
+    immediate = True
+
+    def __init__(self, root: Path, ignored_dirs: Collection[str] = ()):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.root = root
+        self.ignored_dirs = set(ignored_dirs)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._dirs: dict[int, str] = {}
+        try:
+            self._watch_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, rel_dir: str) -> None:
+        stack = [rel_dir]
+        while len(stack):
+            rel_dir = stack.pop()
+            location = os.path.join(self.root, rel_dir)
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(location), INOTIFY_MASK
+            )
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue
+                # Most likely out of watches (ENOSPC).
+                raise OSError(error, os.strerror(error))
+            self._dirs[wd] = rel_dir
+            try:
+                with os.scandir(location) as it:
+                    for entry in it:
+                        rel_path = _join(rel_dir, entry.name)
+                        if (
+                            entry.is_dir(follow_symlinks=False)
+                            and _is_watched_dir(entry.name)
+                            and rel_path not in self.ignored_dirs
+                        ):
+                            stack.append(rel_path)
+            except OSError:
+                continue
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return bool(readable)
+
+    def read(self, timeout: float) -> Changes:
+        changes = Changes()
+        if timeout > 0 and not self.wait(timeout):
+            return changes
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            self._parse(data, changes)
+        return changes
+
+    def _parse(self, data: bytes, changes: Changes) -> None:
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changes.overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            rel_dir = self._dirs.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel_path = _join(rel_dir, name)
+
+            if mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO):
+                changes.directories.add(rel_dir)
+                if (
+                    mask & IN_ISDIR
+                    and mask & (IN_CREATE | IN_MOVED_TO)
+                    and _is_watched_dir(name)
+                    and rel_path not in self.ignored_dirs
+                ):
+                    # Files may already have been created in it.
+                    changes.directories.add(rel_path)
+                    try:
+                        self._watch_tree(rel_path)
+                    except OSError:
+                        changes.overflow = True
+            elif mask & IN_ISDIR:
+                continue
+            elif name.endswith(".py"):
+                changes.modified.add(rel_path)
+            elif name == ".gitignore":
+                changes.directories.add(rel_dir)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingBackend:
+    """
+    Finds changes by comparing the stats of the files of the project every
+    `interval` seconds. Works everywhere, including in containers and on
+    network file systems where inotify events are not delivered.
+    """
+
+    immediate = False
+
+    def __init__(
+        self,
+        root: Path,
+        ignored_dirs: Collection[str] = (),
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.root = root
+        self.ignored_dirs = set(ignored_dirs)
+        self.interval = interval
+        self.min_debounce = interval
+        self._dirs, self._files = self._scan()
+        self._last_scan = time.monotonic()
+
+    def _scan(self) -> tuple[dict[str, int], dict[str, tuple[int, int]]]:
+        dirs: dict[str, int] = {}
+        files: dict[str, tuple[int, int]] = {}
+        stack = [""]
+        while len(stack):
+            rel_dir = stack.pop()
+            location = os.path.join(self.root, rel_dir)
+            try:
+                dirs[rel_dir] = os.stat(location).st_mtime_ns
+                with os.scandir(location) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = _join(rel_dir, entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if (
+                            _is_watched_dir(entry.name)
+                            and rel_path not in self.ignored_dirs
+                        ):
+                            stack.append(rel_path)
+                    elif entry.name.endswith(".py") or (
+                        entry.name == ".gitignore"
+                    ):
+                        stat = entry.stat()
+                        files[rel_path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return dirs, files
+
+    def wait(self, timeout: float) -> bool:
+        wait = self._last_scan + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return False
+        time.sleep(max(wait, 0))
+        return True
+
+    def read(self, timeout: float) -> Changes:
+        changes = Changes()
+        if not self.wait(timeout):
+            return changes
+
+        dirs, files = self._scan()
+        self._last_scan = time.monotonic()
+        for rel_dir in dirs.keys() | self._dirs.keys():
+            if dirs.get(rel_dir) != self._dirs.get(rel_dir):
+                changes.directories.add(rel_dir)
+        for rel_path in files.keys() | self._files.keys():
+            if files.get(rel_path) == self._files.get(rel_path):
+                continue
+            rel_dir = rel_path.rpartition("/")[0]
+            if rel_path not in files or rel_path not in self._files:
+                changes.directories.add(rel_dir)
+            elif rel_path.endswith(".py"):
+                changes.modified.add(rel_path)
+            else:
+                changes.directories.add(rel_dir)
+        self._dirs, self._files = dirs, files
+        return changes
+
+    def close(self) -> None:
+        pass
+
+
+def create_backend(
+    root: Path, ignored_dirs: Collection[str] = ()
+) -> WatcherBackend:
+    """
+    inotify backend if it can be used, polling backend otherwise.
+    """
+    try:
+        return InotifyBackend(root, ignored_dirs)
+    except OSError:
+        return PollingBackend(root, ignored_dirs)
+
+
+class Watcher:
+    """
+    Watches the files of a project so that its cached state is only
+    invalidated for the modules that changed.
+
+    Changes are collected by a background thread, which waits for bursts
+    of changes (a `git checkout` for instance) to be over before reporting
+    them. They are applied to the project by `sync`, which
+    `Project.get_importers` calls instead of checking every module of the
+    project. `sync` also reads the changes the thread has not seen yet, so
+    that a file saved right before a refactoring is taken into account.
+    """
+
+    def __init__(
+        self,
+        project: "Project",
+        backend: WatcherBackend | None = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ):
+        self.project = project
+        if backend is None:
+            backend = create_backend(project.root, self._ignored_dirs())
+        self.backend = backend
+        self.debounce = max(debounce, backend.min_debounce)
+        self.batches = 0
+        self._pending = Changes()
+        self._settling = False
+        # The state of the project has been rebuilt since the watcher
+        # started, and no events were lost since then.
+        self._synced = False
+        self._condition = threading.Condition()
+        # Held while reading the backend, until the changes read are either
+        # pending or being debounced.
+        self._read_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def _ignored_dirs(self) -> set[str]:
+        ignored = set(ROOT_EXCLUDED_DIRS)
+        if self.project.parse_cache is not None:
+            cache_dir = self.project.parse_cache.root.resolve()
+            root = self.project.root.resolve()
+            if cache_dir.is_relative_to(root):
+                ignored.add(cache_dir.relative_to(root).as_posix())
+        return ignored
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "Watcher":
+        self._thread = threading.Thread(
+            target=self._run, name="pyro-watcher", daemon=True
+        )
+        self._thread.start()
+        self.project.watcher = self
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.backend.close()
+        if self.project.watcher is self:
+            self.project.watcher = None
+
+    def _read(self, timeout: float) -> Changes:
+        if not self.backend.wait(timeout):
+            return Changes()
+        with self._read_lock:
+            changes = self.backend.read(0)
+            if changes:
+                with self._condition:
+                    self._settling = True
+            return changes
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                changes = self._read(0.5)
+                if not changes:
+                    continue
+                deadline = time.monotonic() + MAX_DEBOUNCE_DELAY
+                while time.monotonic() < deadline:
+                    more = self._read(self.debounce)
+                    if not more:
+                        break
+                    changes.update(more)
+                with self._condition:
+                    self._pending.update(changes)
+                    self._settling = False
+                    self.batches += 1
+                    self._condition.notify_all()
+        finally:
+            with self._condition:
+                self._settling = False
+                self._condition.notify_all()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Waits until changes are pending. Returns False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: bool(self._pending) or not self.running,
+                timeout=timeout,
+            )
+
+    def _collect(self) -> Changes:
+        """
+        Changes reported so far and changes not read yet by the thread,
+        once a burst in progress is over.
+        """
+        deadline = time.monotonic() + MAX_DEBOUNCE_DELAY
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: not self._settling,
+                    timeout=max(deadline - time.monotonic(), 0),
+                )
+            with self._read_lock:
+                with self._condition:
+                    if self._settling and time.monotonic() < deadline:
+                        # A new burst started in the meantime.
+                        continue
+                    changes, self._pending = self._pending, Changes()
+                    # The changes of a burst still going on are not known.
+                    changes.overflow = changes.overflow or self._settling
+                if self.backend.immediate:
+                    changes.update(self.backend.read(0))
+                return changes
+
+    def sync(self) -> None:
+        """
+        Applies the changes made so far to the project, waiting for a burst
+        in progress to be over. The import graph of the project is up to
+        date afterwards.
+        """
+        changes = self._collect()
+
+        project = self.project
+        if changes.overflow or not self._synced or not self.running:
+            project.module_cache.clear()
+            project.import_graph.refresh()
+            self._synced = self.running
+            return
+
+        names = []
+        for rel_path in changes.modified:
+            name = ".".join(Path(rel_path).with_suffix("").parts)
+            project.module_cache.invalidate(name)
+            names.append(name)
+
+        if len(changes.directories):
+            for rel_dir in changes.directories:
+                project.manifest.invalidate(rel_dir)
+            # Modules may have been added or removed, they are discovered
+            # again. Only the listings of these directories are rescanned.
+            project.import_graph.refresh()
+        elif self.backend.immediate:
+            project.import_graph.update(
+                name for name in names if name in project.import_graph
+            )
+        else:
+            # The backend has not seen the latest changes yet, the known
+            # modules are checked for changes instead.
+            project.import_graph.update(list(project.import_graph))
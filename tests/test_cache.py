@@ -0,0 +1,126 @@
+import os
+import tempfile
+from pathlib import Path
+
+import libcst as cst
+from utils import code, get_temp_project
+
+from pyro import Project
+from pyro.cache import TREE_SIZE_FACTOR, ModuleCache, ParseCache
+
+
+def get_temp_dir() -> Path:
+    return Path(tempfile.mkdtemp(prefix="pyro_test_cache"))
+
+
+def test_parse_cache_roundtrip():
+    root = get_temp_dir()
+    cache = ParseCache(root / "cache")
+    location = root / "mod.py"
+    content = "x = 1\n"
+    location.write_text(content)
+
+    assert cache.get(location, content) is None
+    cache.put(location, content, cst.parse_module(content))
+    tree = cache.get(location, content)
+    assert tree is not None
+    assert tree.code == content
+    assert (root / "cache" / ".gitignore").exists()
+
+
+def test_parse_cache_invalidated_on_change():
+    root = get_temp_dir()
+    cache = ParseCache(root / "cache")
+    location = root / "mod.py"
+    location.write_text("x = 1\n")
+    cache.put(location, "x = 1\n", cst.parse_module("x = 1\n"))
+
+    location.write_text("x = 22\n")
+    assert cache.get(location, "x = 22\n") is None
+
+
+def test_parse_cache_evicts_least_recently_used():
+    root = get_temp_dir()
+    contents = {f"mod{k}": f"x{k} = {k}\n" for k in range(3)}
+    for name, content in contents.items():
+        (root / f"{name}.py").write_text(content)
+
+    cache = ParseCache(root / "cache")
+    for name, content in contents.items():
+        cache.put(root / f"{name}.py", content, cst.parse_module(content))
+    entry_size = cache._compute_size() // 3
+
+    # Make mod0 the most recently used entry
+    for k, (path, _) in enumerate(
+        sorted(cache._entries(), key=lambda e: e[1].st_mtime_ns)
+    ):
+        os.utime(path, ns=(k, k))
+    assert cache.get(root / "mod0.py", contents["mod0"]) is not None
+
+    cache.max_size = entry_size * 2
+    cache.prune()
+
+    assert cache.get(root / "mod0.py", contents["mod0"]) is not None
+    assert len(cache._entries()) == 1
+
+
+def test_project_uses_parse_cache():
+    root = get_temp_dir()
+    project = Project(root, cache_dir=root / ".pyro_cache")
+    mod1 = code(
+        """
+        def test():
+            return 1
+        """
+    )
+    project.create_module("mod1", mod1)
+
+    assert project.get_module("mod1").get_content() == mod1
+    assert project.parse_cache is not None
+    assert len(project.parse_cache._entries()) == 1
+    assert project.get_module("mod1").get_content() == mod1
+    assert len(project.parse_cache._entries()) == 1
+
+
+def test_module_cache_invalidated_on_stat_change():
+    root = get_temp_dir()
+    location = root / "mod.py"
+    location.write_text("x = 1\n")
+    cache = ModuleCache()
+    cache.put("mod", location.stat(), cst.parse_module("x = 1\n"))
+    assert cache.get("mod", location.stat()) is not None
+
+    location.write_text("x = 22\n")
+    assert cache.get("mod", location.stat()) is None
+    assert "mod" not in cache
+
+
+def test_module_cache_budget():
+    root = get_temp_dir()
+    stats = {}
+    for k in range(3):
+        location = root / f"mod{k}.py"
+        location.write_text(f"x{k} = {k}\n")
+        stats[f"mod{k}"] = location.stat()
+
+    cache = ModuleCache(budget=stats["mod0"].st_size * TREE_SIZE_FACTOR * 2)
+    cache.put("mod0", stats["mod0"], cst.parse_module("x0 = 0\n"))
+    cache.put("mod1", stats["mod1"], cst.parse_module("x1 = 1\n"))
+    assert cache.get("mod0", stats["mod0"]) is not None
+    cache.put("mod2", stats["mod2"], cst.parse_module("x2 = 2\n"))
+
+    assert len(cache) == 2
+    assert "mod0" in cache
+    assert "mod1" not in cache
+    assert "mod2" in cache
+
+
+def test_project_reuses_parsed_module():
+    project = get_temp_project()
+    project.create_module("mod1", "x = 1\n")
+
+    module = project.get_module("mod1")
+    assert project.get_module("mod1").tree is module.tree
+
+    project.save_module_content("mod1", "x = 2\n")
+    assert project.get_module("mod1").get_content() == "x = 2\n"
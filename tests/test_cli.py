@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+# Cumulative import time of `pyro.cli`, in microseconds. Importing libcst
+# or black alone goes over it.
+IMPORT_TIME_BUDGET_US = 300_000
+
+HEAVY_MODULES = ["libcst", "black", "isort", "importlib.metadata"]
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_help_does_not_import_heavy_modules():
+    result = run_python(
+        "import sys\n"
+        "from pyro.cli import cli\n"
+        "try:\n"
+        "    cli(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sys.modules))\n"
+    )
+    modules = result.stdout.splitlines()[-1].split()
+    assert "Usage:" in result.stdout
+    for heavy_module in HEAVY_MODULES:
+        assert heavy_module not in modules
+
+
+def test_cli_import_time_budget():
+    result = run_python("import pyro.cli", "-X", "importtime")
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "pyro.cli":
+            assert int(cumulative) < IMPORT_TIME_BUDGET_US
+            break
+    else:
+        raise AssertionError("pyro.cli was not imported")
@@ -0,0 +1,156 @@
+import os
+
+import pytest
+from utils import get_temp_project
+
+from pyro.discovery import (
+    DirectoryManifest,
+    DiscoveryConfig,
+    IgnoreRules,
+    discover_modules,
+)
+
+
+def write_file(project, path: str, content: str = "x = 1\n") -> None:
+    location = project.root / path
+    location.parent.mkdir(parents=True, exist_ok=True)
+    location.write_text(content)
+
+
+def test_ignore_rules():
+    rules = IgnoreRules(
+        "",
+        [
+            "# comment",
+            "*.pyc",
+            "build/",
+            "/scripts",
+            "docs/**/conf.py",
+            "generated_*.py",
+            "!generated_keep.py",
+        ],
+    )
+    assert rules.match("a/b.pyc", False)
+    assert rules.match("build", True)
+    assert rules.match("pkg/build", True)
+    assert rules.match("build", False) is None
+    assert rules.match("scripts", True)
+    assert rules.match("pkg/scripts", True) is None
+    assert rules.match("docs/conf.py", False)
+    assert rules.match("docs/a/b/conf.py", False)
+    assert rules.match("pkg/generated_x.py", False)
+    assert rules.match("pkg/generated_keep.py", False) is False
+    assert rules.match("pkg/mod.py", False) is None
+
+
+def test_ignore_rules_nested():
+    rules = IgnoreRules("pkg", ["/local.py"])
+    assert rules.match("pkg/local.py", False)
+    assert rules.match("local.py", False) is None
+    assert rules.match("pkg/sub/local.py", False) is None
+
+
+def test_discover_skips_environments():
+    project = get_temp_project()
+    project.create_module("pkg.mod", "x = 1\n")
+    project.create_module("build.lib.pkg.mod", "x = 1\n")
+    project.create_module("pkg.build.mod", "x = 1\n")
+    write_file(project, ".venv/lib/mod.py")
+    write_file(project, "env/lib/mod.py")
+    (project.root / "env/pyvenv.cfg").touch()
+
+    # Only the build directory of the root is a build output.
+    assert list(discover_modules(project.root)) == [
+        "pkg/__init__.py",
+        "pkg/mod.py",
+        "pkg/build/__init__.py",
+        "pkg/build/mod.py",
+    ]
+
+
+def test_discover_gitignore_and_pyproject():
+    project = get_temp_project()
+    project.create_module("pkg.mod", "x = 1\n")
+    project.create_module("pkg.generated", "x = 1\n")
+    project.create_module("scripts.run", "x = 1\n")
+    project.create_module("tests.test_mod", "x = 1\n")
+    (project.root / "pkg/.gitignore").write_text("generated.py\n")
+    (project.root / "pyproject.toml").write_text(
+        '[tool.pyro]\nexclude = ["scripts/"]\ninclude = ["pkg/**"]\n'
+    )
+
+    assert list(discover_modules(project.root)) == [
+        "pkg/__init__.py",
+        "pkg/mod.py",
+    ]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "[tool.pyro\n",
+        '[tool.pyro]\nexclude = "scripts/"\n',
+        "[tool.pyro]\ninclude = [1]\n",
+        '[tool.pyro]\nrespect-gitignore = "no"\n',
+        'tool = {pyro = "x"}\n',
+    ],
+)
+def test_discovery_config_invalid(content):
+    project = get_temp_project()
+    (project.root / "pyproject.toml").write_text(content)
+
+    with pytest.raises(ValueError, match="pyproject.toml"):
+        DiscoveryConfig.from_pyproject(project.root)
+
+
+def test_discover_symlink_loop():
+    project = get_temp_project()
+    project.create_module("pkg.mod", "x = 1\n")
+    os.symlink(project.root / "pkg", project.root / "pkg/loop")
+    (project.root / "pyproject.toml").write_text(
+        "[tool.pyro]\nfollow-symlinks = true\n"
+    )
+
+    assert list(discover_modules(project.root)) == [
+        "pkg/__init__.py",
+        "pkg/mod.py",
+    ]
+
+
+def test_project_walk_modules_excludes():
+    project = get_temp_project()
+    project.create_module("mod", "x = 1\n")
+    write_file(project, ".tox/py311/lib/mod.py")
+
+    assert [name for name, _ in project.walk_modules()] == ["mod"]
+
+
+def test_discover_reuses_manifest():
+    project = get_temp_project()
+    project.create_module("pkg.mod", "x = 1\n")
+    for location in [project.root, project.root / "pkg"]:
+        os.utime(location, ns=(10**18, 10**18))
+
+    manifest_location = project.root / ".pyro_cache/manifest.json"
+    manifest = DirectoryManifest(manifest_location)
+    assert list(discover_modules(project.root, manifest=manifest)) == [
+        "pkg/__init__.py",
+        "pkg/mod.py",
+    ]
+    assert manifest_location.exists()
+
+    # The listing of a directory whose mtime did not change is reused.
+    write_file(project, "pkg/other.py")
+    os.utime(project.root / "pkg", ns=(10**18, 10**18))
+    manifest = DirectoryManifest(manifest_location)
+    assert list(discover_modules(project.root, manifest=manifest)) == [
+        "pkg/__init__.py",
+        "pkg/mod.py",
+    ]
+
+    os.utime(project.root / "pkg", ns=(15 * 10**17, 15 * 10**17))
+    assert list(discover_modules(project.root, manifest=manifest)) == [
+        "pkg/__init__.py",
+        "pkg/mod.py",
+        "pkg/other.py",
+    ]
@@ -0,0 +1,84 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pyro.edits import EditSet
+
+
+def get_temp_dir() -> Path:
+    return Path(tempfile.mkdtemp(prefix="pyro_test_edits"))
+
+
+def test_edit_set_commit():
+    root = get_temp_dir()
+    (root / "a.py").write_text("a = 1\n")
+    (root / "b.py").write_text("b = 1\n")
+
+    edits = EditSet()
+    assert edits.add(root / "a.py", "a = 2\n")
+    assert not edits.add(root / "b.py", "b = 1\n")
+    assert edits.add(root / "c.py", "c = 1\n")
+    assert len(edits) == 2
+
+    assert edits.commit(fsync=True) == [root / "a.py", root / "c.py"]
+    assert (root / "a.py").read_text() == "a = 2\n"
+    assert (root / "c.py").read_text() == "c = 1\n"
+    assert sorted(os.listdir(root)) == ["a.py", "b.py", "c.py"]
+
+
+def test_edit_set_commit_fsync(monkeypatch):
+    root = get_temp_dir()
+    (root / "sub").mkdir()
+    edits = EditSet()
+    edits.add(root / "a.py", "a = 1\n")
+    edits.add(root / "sub/b.py", "b = 1\n")
+    edits.add(root / "sub/c.py", "c = 1\n")
+
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(
+        os,
+        "fsync",
+        lambda fd: synced.append(os.fstat(fd).st_ino) or fsync(fd),
+    )
+    monkeypatch.setattr(os, "sync", lambda: pytest.fail("Syncs everything"))
+
+    edits.commit(fsync=True)
+
+    # The files, through their temporary file, then each directory once.
+    files = ["a.py", "sub/b.py", "sub/c.py"]
+    assert synced[:3] == [(root / name).stat().st_ino for name in files]
+    assert sorted(synced[3:]) == sorted(
+        [root.stat().st_ino, (root / "sub").stat().st_ino]
+    )
+
+
+def test_edit_set_rollback(monkeypatch):
+    root = get_temp_dir()
+    (root / "a.py").write_text("a = 1\n")
+    (root / "b.py").write_text("b = 1\n")
+
+    edits = EditSet()
+    edits.add(root / "a.py", "a = 2\n")
+    edits.add(root / "c.py", "c = 1\n")
+    edits.add(root / "b.py", "b = 2\n")
+
+    replace = os.replace
+    calls = []
+
+    def failing_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        edits.commit()
+    monkeypatch.undo()
+
+    assert (root / "a.py").read_text() == "a = 1\n"
+    assert (root / "b.py").read_text() == "b = 1\n"
+    assert sorted(os.listdir(root)) == ["a.py", "b.py"]
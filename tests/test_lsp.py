@@ -0,0 +1,242 @@
+import io
+import json
+
+from utils import code, get_temp_project
+
+from pyro.lsp import (
+    LanguageServer,
+    end_position,
+    position_to_offset,
+    read_message,
+    write_message,
+)
+
+
+def start_server(project) -> LanguageServer:
+    server = LanguageServer()
+    responses = server.handle(
+        {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {"rootUri": project.root.as_uri()},
+        }
+    )
+    assert "capabilities" in responses[0]["result"]
+    return server
+
+
+def open_document(server, project, name, text):
+    uri = project.get_module_path(name).as_uri()
+    server.handle(
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didOpen",
+            "params": {
+                "textDocument": {
+                    "uri": uri,
+                    "languageId": "python",
+                    "version": 1,
+                    "text": text,
+                }
+            },
+        }
+    )
+    return uri
+
+
+def test_positions():
+    text = "a = '\U0001f600'\nb = 2\n"
+    assert position_to_offset(text, 0, 7) == 6
+    assert position_to_offset(text, 1, 2) == text.index("b") + 2
+    assert position_to_offset(text, 5, 0) == len(text)
+    assert end_position(text) == {"line": 2, "character": 0}
+    assert end_position("x = 1") == {"line": 0, "character": 5}
+
+
+def test_framing():
+    stream = io.BytesIO()
+    write_message(stream, {"jsonrpc": "2.0", "id": 1, "result": "é"})
+    stream.seek(0)
+    assert read_message(stream) == {"jsonrpc": "2.0", "id": 1, "result": "é"}
+    assert read_message(stream) is None
+
+
+def test_lsp_move_open_buffer():
+    project = get_temp_project()
+    project.create_module("mod1", "x = 1\n")
+    project.create_module("mod2", "")
+    project.create_module("mod3", "from mod1 import x\n\nprint(x)\n")
+
+    server = start_server(project)
+    # The buffer is not saved, the file only contains `x`.
+    uri = open_document(
+        server, project, "mod1", "x = 1\n\n\ndef test():\n    return 1\n"
+    )
+
+    responses = server.handle(
+        {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "textDocument/codeAction",
+            "params": {
+                "textDocument": {"uri": uri},
+                "range": {
+                    "start": {"line": 4, "character": 4},
+                    "end": {"line": 4, "character": 4},
+                },
+                "context": {"diagnostics": []},
+            },
+        }
+    )
+    actions = responses[0]["result"]
+    assert [action["command"]["command"] for action in actions] == [
+        "pyro.move",
+        "pyro.reorderFuncArg",
+    ]
+    arguments = actions[0]["command"]["arguments"][0]
+    assert arguments["symbol"] == "test"
+
+    arguments["destination"] = "mod2"
+    responses = server.handle(
+        {
+            "jsonrpc": "2.0",
+            "id": 3,
+            "method": "workspace/executeCommand",
+            "params": {"command": "pyro.move", "arguments": [arguments]},
+        }
+    )
+    apply_edit, result = responses
+    assert result == {"jsonrpc": "2.0", "id": 3, "result": None}
+    assert apply_edit["method"] == "workspace/applyEdit"
+    changes = apply_edit["params"]["edit"]["changes"]
+    assert changes[uri] == [
+        {
+            "range": {
+                "start": {"line": 0, "character": 0},
+                "end": {"line": 5, "character": 0},
+            },
+            "newText": "x = 1\n",
+        }
+    ]
+    assert changes[project.get_module_path("mod2").as_uri()][0][
+        "newText"
+    ] == code(
+        """
+        def test():
+            return 1
+        """
+    )
+    # Nothing is written.
+    assert project.get_module_content("mod1") == "x = 1\n"
+    assert project.get_module_content("mod2") == ""
+
+
+def test_lsp_incremental_changes():
+    project = get_temp_project()
+    project.create_module("mod1", "def f(a, b):\n    pass\n")
+    project.create_module("mod2", "from mod1 import f\n\nf(1, 2)\n")
+
+    server = start_server(project)
+    uri = open_document(server, project, "mod2", "from mod1 import f\n")
+    server.handle(
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didChange",
+            "params": {
+                "textDocument": {"uri": uri, "version": 2},
+                "contentChanges": [
+                    {
+                        "range": {
+                            "start": {"line": 1, "character": 0},
+                            "end": {"line": 1, "character": 0},
+                        },
+                        "text": "\nf(3, 4)\n",
+                    }
+                ],
+            },
+        }
+    )
+    server_project = server.project
+    assert server_project is not None
+    assert (
+        server_project.get_module_content("mod2")
+        == "from mod1 import f\n\nf(3, 4)\n"
+    )
+    tree = server_project.get_module("mod2").tree
+    assert server_project.get_module("mod2").tree is tree
+
+    responses = server.handle(
+        {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "workspace/executeCommand",
+            "params": {
+                "command": "pyro.reorderFuncArg",
+                "arguments": [
+                    {
+                        "uri": project.get_module_path("mod1").as_uri(),
+                        "funcName": "f",
+                        "newOrder": [1, 0],
+                    }
+                ],
+            },
+        }
+    )
+    changes = responses[0]["params"]["edit"]["changes"]
+    assert changes[uri][0]["newText"] == "from mod1 import f\n\nf(4, 3)\n"
+
+    server.handle(
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didClose",
+            "params": {"textDocument": {"uri": uri}},
+        }
+    )
+    assert (
+        server_project.get_module_content("mod2")
+        == "from mod1 import f\n\nf(1, 2)\n"
+    )
+
+
+def test_lsp_errors():
+    project = get_temp_project()
+    server = LanguageServer(project.root)
+    responses = server.handle(
+        {"jsonrpc": "2.0", "id": 1, "method": "shutdown"}
+    )
+    assert responses[0]["error"]["code"] == -32002
+
+    server = start_server(project)
+    responses = server.handle(
+        {"jsonrpc": "2.0", "id": 2, "method": "textDocument/hover"}
+    )
+    assert responses[0]["error"]["code"] == -32601
+    assert server.handle({"jsonrpc": "2.0", "method": "$/cancel"}) == []
+
+
+def test_lsp_serve():
+    project = get_temp_project()
+    reader = io.BytesIO()
+    for message in [
+        {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {"rootUri": None},
+        },
+        {"jsonrpc": "2.0", "id": 2, "method": "shutdown"},
+        {"jsonrpc": "2.0", "method": "exit"},
+        {"jsonrpc": "2.0", "id": 3, "method": "shutdown"},
+    ]:
+        write_message(reader, message)
+    reader.seek(0)
+    writer = io.BytesIO()
+
+    LanguageServer(project.root).serve(reader, writer)
+    writer.seek(0)
+    responses = []
+    while (response := read_message(writer)) is not None:
+        responses.append(response)
+    assert [response["id"] for response in responses] == [1, 2]
+    assert json.dumps(responses[1]["result"]) == "null"
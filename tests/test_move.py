@@ -1,8 +1,15 @@
+import importlib
+
+import libcst as cst
 import pytest
+from libcst.metadata import MetadataWrapper, ScopeProvider
 from utils import code, get_temp_project
 
 from pyro.refactorings import move
 
+# `pyro.refactorings.move` is shadowed by the function of the same name.
+move_module = importlib.import_module("pyro.refactorings.move")
+
 
 def test_move():
     project = get_temp_project()
@@ -1342,3 +1349,434 @@ def test_type_local_param_has_requirements():
 
     assert project.get_module_content("mod1") == "\n"
     assert project.get_module_content("mod2") == mod2_expected
+
+
+def test_move_parallel(monkeypatch):
+    monkeypatch.setattr(move_module, "PARALLEL_MIN_MODULES", 0)
+    project = get_temp_project()
+
+    mod1 = code(
+        """
+        def test():
+            return 1
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+    for k in range(4):
+        project.create_module(
+            f"user{k}",
+            code(
+                f"""
+                from mod1 import test
+
+                x{k} = test()
+                """
+            ),
+        )
+    project.create_module("other", "import os\n\nx = os.getcwd()\n")
+
+    start_methods = []
+    executor = move_module.ProcessPoolExecutor
+    monkeypatch.setattr(
+        move_module,
+        "ProcessPoolExecutor",
+        lambda **kwargs: start_methods.append(
+            kwargs["mp_context"].get_start_method()
+        )
+        or executor(**kwargs),
+    )
+
+    outputs = move(project, "mod1", 1, 4, "mod2", jobs=2)
+
+    # Forking the threads of the daemon could deadlock.
+    assert start_methods == [move_module.WORKER_START_METHOD]
+    assert start_methods != ["fork"]
+
+    assert [file["filename"] for file in outputs["editedFiles"]] == [
+        "mod1.py",
+        "mod2.py",
+        "user0.py",
+        "user1.py",
+        "user2.py",
+        "user3.py",
+    ]
+    for k in range(4):
+        assert project.get_module_content(f"user{k}") == code(
+            f"""
+            from mod2 import test
+
+            x{k} = test()
+            """
+        )
+
+
+def test_move_dry_run():
+    project = get_temp_project()
+
+    mod1 = code(
+        """
+        def test():
+            return 1
+
+
+        x = test()
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+
+    outputs = move(project, "mod1", 1, 4, "mod2", dry_run=True)
+
+    assert outputs["dryRun"]
+    assert project.get_module_content("mod1") == mod1
+    assert project.get_module_content("mod2") == ""
+    diffs = {file["filename"]: file["diff"] for file in outputs["editedFiles"]}
+    assert diffs["mod2.py"] == (
+        "--- a/mod2.py\n"
+        "+++ b/mod2.py\n"
+        "@@ -0,0 +1,2 @@\n"
+        "+def test():\n"
+        "+    return 1\n"
+    )
+    assert "+from mod2 import test\n" in diffs["mod1.py"]
+
+
+def test_move_dotted_import_becomes_unused():
+    project = get_temp_project()
+
+    project.create_module("pkg.mod1", "def test():\n    return 1\n")
+    project.create_module("pkg.mod2", "")
+    project.create_module(
+        "mod3",
+        code(
+            """
+        import pkg.mod1
+
+        x = pkg.mod1.test()
+    """
+        ),
+    )
+
+    move(project, "pkg.mod1", 1, 4, "pkg.mod2")
+
+    assert project.get_module_content("mod3") == code(
+        """
+        from pkg.mod2 import test
+
+        x = test()
+    """
+    )
+
+
+def test_move_counters():
+    project = get_temp_project()
+
+    project.create_module("mod1", "def test():\n    return 1\n")
+    project.create_module("mod2", "")
+    project.create_module("mod3", "from mod1 import test\n\nx = test()\n")
+    project.create_module("mod4", "import mod1\n\nx = 1\n")
+    project.create_module("mod5", "y = 2\n")
+
+    counters = move(project, "mod1", 1, 4, "mod2")["counters"]
+
+    assert counters == {
+        "modulesDiscovered": 5,
+        "modulesWalked": 1,
+        # mod4 imports mod1 but never references `test`.
+        "modulesSkipped": 1,
+        "modulesParsed": 3,
+        "moduleCacheHits": 0,
+        "parseCacheHits": 0,
+        # The scopes of each edited module are resolved once.
+        "metadataWrappers": 2,
+        "importsUpdated": 1,
+        "filesFormatted": 3,
+    }
+
+    # Counters are per refactoring, the modules left untouched are cached.
+    counters = move(project, "mod2", 1, 4, "mod1")["counters"]
+    assert counters["modulesParsed"] == 3
+    assert counters["moduleCacheHits"] == 0
+    assert counters["importsUpdated"] == 1
+
+
+def test_move_keeps_unrelated_unused_imports():
+    project = get_temp_project()
+
+    mod1 = code(
+        """
+        import os
+        import sys
+
+
+        def test():
+            return os.getcwd()
+
+
+        def other():
+            return 1
+    """
+    )
+    mod3 = code(
+        """
+        import json
+
+        from mod1 import other, test
+
+        x = test() + other()
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+    project.create_module("mod3", mod3)
+
+    move(project, "mod1", 5, 4, "mod2")
+
+    assert project.get_module_content("mod1") == code(
+        """
+        import sys
+
+
+        def other():
+            return 1
+    """
+    )
+    assert project.get_module_content("mod3") == code(
+        """
+        import json
+
+        from mod1 import other
+        from mod2 import test
+
+        x = test() + other()
+    """
+    )
+
+    move(project, "mod2", 4, 4, "mod1", clean_all_imports=True)
+
+    assert project.get_module_content("mod3") == code(
+        """
+        from mod1 import other, test
+
+        x = test() + other()
+    """
+    )
+
+
+def test_move_symbol():
+    project = get_temp_project()
+
+    mod1 = code(
+        """
+        import os
+
+
+        @staticmethod
+        def test():
+            return os.getcwd()
+
+
+        VALUE: int = 2
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+    project.create_module("mod3", "from mod1 import VALUE, test\n")
+
+    move_module.move_symbol(project, "mod1", "test", "mod2")
+    move_module.move_symbol(project, "mod1", "VALUE", "mod2")
+
+    assert project.get_module_content("mod1").strip() == ""
+    assert project.get_module_content("mod2") == code(
+        """
+        import os
+
+
+        @staticmethod
+        def test():
+            return os.getcwd()
+
+
+        VALUE: int = 2
+    """
+    )
+    with pytest.raises(ValueError):
+        move_module.move_symbol(project, "mod2", "missing", "mod1")
+
+
+def test_remove_symbols_visits_enclosing_statements_only():
+    source = code(
+        """
+        import os
+
+
+        def first():
+            return os.sep
+
+
+        class Test:
+            def method(self):
+                return first()
+
+
+        def last():
+            pass
+    """
+    )
+    wrapper = MetadataWrapper(cst.parse_module(source))
+    scopes = set(wrapper.resolve(ScopeProvider).values())
+
+    visited = []
+
+    class Remover(move_module.RemoveSymbolsAtLocations):
+        def visit_symbol(self, node):
+            visited.append(node.name.value)
+            return super().visit_symbol(node)
+
+    remover = Remover(scopes, [(9, 4), (13, 0), (20, 0)], "mod1")
+    tree = wrapper.visit(remover)
+
+    assert visited == ["Test", "method", "last"]
+    method, last, outside = remover.removed
+    # The innermost symbol at the location is removed.
+    assert method is not None and method.name == "method"
+    assert "first" in method.requirements
+    assert last is not None and last.name == "last"
+    assert outside is None
+    assert tree.code == code(
+        """
+        import os
+
+
+        def first():
+            return os.sep
+
+
+        class Test:
+            pass
+    """
+    )
+
+
+def test_move_removes_imports_only_used_by_decorators():
+    project = get_temp_project()
+
+    mod1 = code(
+        """
+        import functools
+        from dataclasses import dataclass
+
+
+        @dataclass
+        class Point:
+            x: int
+
+
+        @functools.cache
+        def test():
+            return 1
+
+
+        def other():
+            return 2
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+
+    move(project, "mod1", 6, 6, "mod2")
+    move(project, "mod1", 5, 4, "mod2")
+
+    assert project.get_module_content("mod1") == code(
+        """
+        def other():
+            return 2
+    """
+    )
+    assert project.get_module_content("mod2") == code(
+        """
+        import functools
+        from dataclasses import dataclass
+
+
+        @dataclass
+        class Point:
+            x: int
+
+
+        @functools.cache
+        def test():
+            return 1
+    """
+    )
+
+
+def test_move_rewrites_every_import_of_the_symbol():
+    project = get_temp_project()
+
+    project.create_module("mod1", "def test():\n    return 1\n")
+    project.create_module("mod2", "")
+    project.create_module(
+        "mod3",
+        code(
+            """
+            from mod1 import test
+
+            x = test()
+
+
+            def g():
+                from mod1 import test
+
+                return test()
+        """
+        ),
+    )
+    project.create_module(
+        "mod4",
+        code(
+            """
+            def f():
+                from mod1 import test
+
+                return test()
+
+
+            def g():
+                from mod1 import test
+
+                return test()
+        """
+        ),
+    )
+
+    move(project, "mod1", 1, 4, "mod2")
+
+    assert project.get_module_content("mod3") == code(
+        """
+        from mod2 import test
+
+        x = test()
+
+
+        def g():
+            from mod2 import test
+
+            return test()
+    """
+    )
+    assert project.get_module_content("mod4") == code(
+        """
+        def f():
+            from mod2 import test
+
+            return test()
+
+
+        def g():
+            from mod2 import test
+
+            return test()
+    """
+    )
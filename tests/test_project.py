@@ -1,4 +1,12 @@
-from utils import get_temp_project
+import os
+
+import libcst as cst
+import pytest
+from utils import code, get_temp_project
+
+from pyro import Module, Project
+from pyro.index import Definition
+from pyro.refactorings.imports import may_reference
 
 
 def test_package_exists():
@@ -66,3 +74,199 @@ def test_project_add_module_and_subpackages():
     assert module_path.exists()
     with open(module_path, "r") as f:
         assert f.read() == "x = 1\n"
+
+
+def test_project_get_importers():
+    project = get_temp_project()
+
+    project.create_module("pkg.mod1", "x = 1\n")
+    project.create_module("pkg.mod2", "from pkg.mod1 import x\n")
+    project.create_module("pkg.mod3", "from .mod1 import x\n")
+    project.create_module("pkg.mod4", "from . import mod1\n")
+    project.create_module("mod5", "import pkg\n")
+    project.create_module("mod6", "from pkg import mod2\n")
+    project.create_module("mod7", "import os\n")
+
+    assert project.get_importers("pkg.mod1") == [
+        "mod5",
+        "pkg.mod2",
+        "pkg.mod3",
+        "pkg.mod4",
+    ]
+
+
+def test_project_get_importers_updated():
+    project = get_temp_project()
+
+    project.create_module("mod1", "x = 1\n")
+    project.create_module("mod2", "import os\n")
+    assert project.get_importers("mod1") == []
+
+    project.save_module_content("mod2", "import mod1\n\nx = mod1.x\n")
+    assert project.get_importers("mod1") == ["mod2"]
+
+    project.create_module("mod3", "from mod1 import x\n")
+    assert project.get_importers("mod1") == ["mod2", "mod3"]
+
+
+def test_project_walk_modules_predicate():
+    project = get_temp_project()
+
+    project.create_module("mod1", "def test():\n    return 1\n")
+    project.create_module("mod2", "import mod1 as m\n\nx = m.test()\n")
+    project.create_module("mod3", "from pkg import mod1\n\nx = 1\n")
+    project.create_module("mod4", "x = 1\n")
+
+    prefilter = may_reference(["mod1"], "test")
+    names = [
+        name
+        for name, _ in project.walk_modules(
+            ["mod2", "mod3", "mod4"], prefilter
+        )
+    ]
+    assert names == ["mod2"]
+
+
+def test_project_save_module_reformat():
+    project = get_temp_project()
+    (project.root / "pyproject.toml").write_text(
+        "[tool.black]\nline-length = 20\n"
+    )
+
+    project.create_module("mod1", "")
+    project.save_module_content(
+        "mod1",
+        "import sys\nimport os\nx = [os.sep,sys.path]\n",
+        reformat=True,
+    )
+
+    assert project.get_module_content("mod1") == (
+        "import os\nimport sys\n\nx = [\n    os.sep,\n    sys.path,\n]\n"
+    )
+
+
+def test_project_module_history():
+    project = get_temp_project()
+    project.create_module("mod1", "x = 1\n")
+
+    module = project.get_module("mod1")
+    module.visit(cst.CSTTransformer())
+    assert len(module.history) == 0
+
+    project = Project(project.root, history_size=2, source_history=True)
+    module = project.get_module("mod1")
+    for _ in range(3):
+        module.visit(cst.CSTTransformer())
+    assert list(module.history) == ["x = 1\n", "x = 1\n"]
+
+
+def test_module_history():
+    module = Module.from_content("x = 1\n")
+    for _ in range(3):
+        module.visit(cst.CSTTransformer())
+    assert len(module.history) == 3
+    assert all(isinstance(tree, cst.Module) for tree in module.history)
+
+
+def test_project_get_exports(monkeypatch):
+    project = get_temp_project()
+    project.create_module(
+        "mod1", 'from os import path\n\n__all__ = ["path"]\n'
+    )
+    project.create_module("mod2", "x = 1\n")
+
+    visited = []
+    visit = cst.Module.visit
+    monkeypatch.setattr(
+        cst.Module,
+        "visit",
+        lambda tree, visitor: visited.append(type(visitor).__name__)
+        or visit(tree, visitor),
+    )
+
+    module = project.get_module("mod1")
+    assert project.get_exports("mod1", module) == {"path"}
+    assert project.get_exports("mod1", project.get_module("mod1")) == {"path"}
+    # Modules without `__all__` are not visited.
+    assert project.get_exports("mod2", project.get_module("mod2")) == set()
+    assert visited == ["GatherExportsVisitor"]
+
+    # Modified trees are visited again.
+    module.visit(cst.CSTTransformer())
+    assert project.get_exports("mod1", module) == {"path"}
+    assert len(visited) == 3
+
+
+def test_project_find_definition():
+    project = get_temp_project()
+    project.create_module(
+        "pkg.mod1",
+        code("""
+            import os
+
+            x = 1; y = 2
+            VALUE = 3
+
+
+            @decorator
+            class Test:
+                pass
+        """),
+    )
+
+    definition = project.find_definition("pkg.mod1", "Test")
+    assert definition == Definition("pkg.mod1", "Test", "class", (8, 0), (9, 8))
+    assert definition.qualified_name == "pkg.mod1.Test"
+    assert project.find_definition("pkg.mod1", "VALUE").start == (4, 0)
+    for name in ["os", "x", "missing"]:
+        with pytest.raises(ValueError):
+            project.find_definition("pkg.mod1", name)
+
+    # The index follows the changes of the module.
+    project.save_module_content("pkg.mod1", "def Test():\n    pass\n")
+    assert project.find_definition("pkg.mod1", "Test").kind == "function"
+
+
+def test_project_import_graph_is_persisted(monkeypatch):
+    root = get_temp_project().root
+    cache_dir = root / ".pyro_cache"
+    project = Project(root, cache_dir=cache_dir)
+    project.create_module("mod1", "def f():\n    pass\n")
+    project.create_module("mod2", "from mod1 import f\n")
+    project.create_module("mod3", "x = 1\n")
+    project.create_module("mod4", "import mod1\n")
+    # Modules modified too recently to be trusted are not persisted.
+    for name in ["mod1", "mod2", "mod3"]:
+        os.utime(project.get_module_path(name), ns=(10**18, 10**18))
+
+    assert project.get_importers("mod1") == ["mod2", "mod4"]
+
+    read = []
+    get_module_content = Project.get_module_content
+    monkeypatch.setattr(
+        Project,
+        "get_module_content",
+        lambda self, name: read.append(name)
+        or get_module_content(self, name),
+    )
+
+    project = Project(root, cache_dir=cache_dir)
+    assert project.get_importers("mod1") == ["mod2", "mod4"]
+    assert project.find_definition("mod1", "f").kind == "function"
+    assert read == ["mod4"]
+
+    # Only the modules that changed are read again.
+    read.clear()
+    with open(project.get_module_path("mod3"), "w") as f:
+        f.write("import mod1\n")
+    os.utime(project.get_module_path("mod3"), ns=(10**18, 10**18 + 1))
+    project.get_module_path("mod2").unlink()
+    project = Project(root, cache_dir=cache_dir)
+    assert project.get_importers("mod1") == ["mod3", "mod4"]
+    assert sorted(read) == ["mod3", "mod4"]
+
+    # Without a cache directory, nothing is persisted.
+    read.clear()
+    project = Project(root)
+    assert project.get_importers("mod1") == ["mod3", "mod4"]
+    assert sorted(read) == ["mod1", "mod3", "mod4"]
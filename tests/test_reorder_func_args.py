@@ -200,3 +200,42 @@ def test_rename_func_should_not_change_unrelevant_files():
 
     assert project.get_module_content("pkg.mod1") == mod1_expected
     assert project.get_module_content("mod2") == mod2_expected
+
+
+def test_rename_func_only_saves_changed_files():
+    project = get_temp_project()
+
+    mod1 = code(
+        """
+        def test(a, b):
+            return a + b
+    """
+    )
+    mod2 = code(
+        """
+        from mod1 import test
+
+        x = test(1, 2)
+    """
+    )
+    # Not formatted with black, and does not call test
+    mod3 = "import mod1\ny = mod1.test\nz = [1,2]\n"
+
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", mod2)
+    project.create_module("mod3", mod3)
+
+    outputs = reorder_func_arg(project, "mod1", "test", [1, 0])
+
+    assert [file["filename"] for file in outputs["editedFiles"]] == [
+        "mod1.py",
+        "mod2.py",
+    ]
+    assert project.get_module_content("mod2") == code(
+        """
+        from mod1 import test
+
+        x = test(2, 1)
+    """
+    )
+    assert project.get_module_content("mod3") == mod3
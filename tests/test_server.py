@@ -0,0 +1,131 @@
+import io
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from utils import code, get_temp_project
+
+from pyro import client
+from pyro.server import Server
+
+
+def test_server_move():
+    project = get_temp_project()
+    project.create_module("mod1", "def test():\n    return 1\n")
+    project.create_module("mod2", "")
+
+    server = Server(project.root)
+    response = server.handle(
+        {
+            "id": 3,
+            "command": "move",
+            "args": {
+                "module_start": "mod1",
+                "lineno": 1,
+                "colno": 4,
+                "module_end": "mod2",
+            },
+        }
+    )
+
+    assert response["success"]
+    assert response["id"] == 3
+    assert project.get_module_content("mod2") == code(
+        """
+        def test():
+            return 1
+        """
+    )
+
+
+def test_server_move_symbol():
+    project = get_temp_project()
+    project.create_module("mod1", "def test():\n    return 1\n")
+    project.create_module("mod2", "")
+
+    server = Server(project.root)
+    response = server.handle(
+        {
+            "id": 4,
+            "command": "move",
+            "args": {
+                "module_start": "mod1",
+                "symbol": "test",
+                "module_end": "mod2",
+            },
+        }
+    )
+
+    assert response["success"]
+    assert project.get_module_content("mod2") == "def test():\n    return 1\n"
+
+
+def test_server_keeps_projects_warm():
+    project = get_temp_project()
+    project.create_module("mod1", "x = 1\n")
+
+    server = Server(project.root)
+    server_project = server.get_project()
+    module = server_project.get_module("mod1")
+    assert server.get_project(str(project.root)) is server_project
+    assert server_project.get_module("mod1").tree is module.tree
+
+
+def test_server_stream():
+    project = get_temp_project()
+    server = Server(project.root)
+    requests = io.StringIO(
+        "\n".join(
+            [
+                json.dumps({"id": 1, "command": "ping"}),
+                "not json",
+                json.dumps({"id": 2, "command": "unknown"}),
+                json.dumps({"id": 3, "command": "shutdown"}),
+                json.dumps({"id": 4, "command": "ping"}),
+            ]
+        )
+    )
+    responses = io.StringIO()
+    server.serve_stream(requests, responses)
+
+    lines = [json.loads(line) for line in responses.getvalue().splitlines()]
+    assert len(lines) == 4
+    assert lines[0]["success"] and lines[0]["id"] == 1
+    assert not lines[1]["success"]
+    assert not lines[2]["success"] and lines[2]["id"] == 2
+    assert lines[3] == {"success": True, "id": 3}
+
+
+def test_server_socket():
+    project = get_temp_project()
+    socket_path = Path(tempfile.mkdtemp(prefix="pyro")) / "d.sock"
+    assert client.request(socket_path, "ping", {}) is None
+
+    server = Server(project.root)
+    thread = threading.Thread(target=server.serve_socket, args=(socket_path,))
+    thread.start()
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.05)
+        response = client.request(socket_path, "ping", {})
+        assert response is not None
+        assert response["success"]
+    finally:
+        client.request(socket_path, "shutdown", {})
+        thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+
+
+def test_server_watch():
+    project = get_temp_project()
+    server = Server(project.root, watch=True)
+    server_project = server.get_project()
+    assert server_project.watcher is not None
+    server.close()
+    assert server_project.watcher is None
@@ -0,0 +1,193 @@
+import libcst as cst
+from utils import code, get_temp_project
+
+from pyro.refactorings.split import split_module
+
+
+def test_split_module():
+    project = get_temp_project()
+
+    mod1 = code("""
+        import os
+
+
+        def fn(x):
+            return x + 1
+
+
+        def test():
+            return fn(1)
+
+
+        def path():
+            return os.path.join("a", "b")
+
+
+        VALUE = 3
+    """)
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+    project.create_module("mod3", "")
+    project.create_module(
+        "mod4",
+        code("""
+            from mod1 import VALUE, path, test
+
+            print(VALUE, path(), test())
+        """),
+    )
+
+    split_module(
+        project,
+        "mod1",
+        [("test", "mod2"), ((12, 0), "mod3")],
+    )
+
+    assert project.get_module_content("mod1") == code("""
+        def fn(x):
+            return x + 1
+
+
+        VALUE = 3
+    """)
+    assert project.get_module_content("mod2") == code("""
+        from mod1 import fn
+
+
+        def test():
+            return fn(1)
+    """)
+    assert project.get_module_content("mod3") == code("""
+        import os
+
+
+        def path():
+            return os.path.join("a", "b")
+    """)
+    assert project.get_module_content("mod4") == code("""
+        from mod1 import VALUE
+        from mod2 import test
+        from mod3 import path
+
+        print(VALUE, path(), test())
+    """)
+
+
+def test_split_module_dependencies_between_moved_symbols():
+    project = get_temp_project()
+
+    mod1 = code("""
+        def fn(x):
+            return x + 1
+
+
+        def test():
+            return fn(1)
+
+
+        def other():
+            return test()
+    """)
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+    project.create_module("mod3", "")
+
+    split_module(
+        project,
+        "mod1",
+        [("fn", "mod2"), ("test", "mod2"), ("other", "mod3")],
+    )
+
+    assert project.get_module_content("mod1").strip() == ""
+    assert project.get_module_content("mod2") == code("""
+        def fn(x):
+            return x + 1
+
+
+        def test():
+            return fn(1)
+    """)
+    assert project.get_module_content("mod3") == code("""
+        from mod2 import test
+
+
+        def other():
+            return test()
+    """)
+
+
+def test_split_module_parses_and_formats_once(monkeypatch):
+    project = get_temp_project()
+    project.create_module(
+        "mod1", "def a():\n    pass\n\n\ndef b():\n    pass\n"
+    )
+    project.create_module("mod2", "")
+    project.create_module("mod3", "")
+    for k in range(5):
+        project.create_module(
+            f"user{k}", "from mod1 import a, b\n\nprint(a, b)\n"
+        )
+
+    parsed = []
+    parse_module = cst.parse_module
+    monkeypatch.setattr(
+        cst,
+        "parse_module",
+        lambda source, *args, **kwargs: parsed.append(source)
+        or parse_module(source, *args, **kwargs),
+    )
+    formatted = []
+    format_source = project.format_source
+    monkeypatch.setattr(
+        project,
+        "format_source",
+        lambda content, location=None: formatted.append(location)
+        or format_source(content, location),
+    )
+
+    result = split_module(project, "mod1", [("a", "mod2"), ("b", "mod3")])
+
+    assert len(result["editedFiles"]) == 8
+    assert len(parsed) == 8
+    assert sorted(formatted) == sorted(set(formatted))
+    assert project.get_module_content("user0") == code("""
+        from mod2 import a
+        from mod3 import b
+
+        print(a, b)
+    """)
+
+
+def test_split_module_removes_imports_only_used_by_decorators():
+    project = get_temp_project()
+    project.create_module(
+        "mod1",
+        code("""
+            from dataclasses import dataclass
+
+
+            @dataclass
+            class Point:
+                x: int
+
+
+            def other():
+                return 2
+        """),
+    )
+    project.create_module("mod2", "")
+
+    split_module(project, "mod1", [("Point", "mod2")])
+
+    assert project.get_module_content("mod1") == code("""
+        def other():
+            return 2
+    """)
+    assert project.get_module_content("mod2") == code("""
+        from dataclasses import dataclass
+
+
+        @dataclass
+        class Point:
+            x: int
+    """)
@@ -0,0 +1,60 @@
+import time
+
+from utils import code, get_temp_project
+
+from pyro.refactorings import move
+from pyro.timings import Timings
+
+
+def test_nested_phases_are_counted_once():
+    timings = Timings(slowest=1)
+    with timings.phase("outer"):
+        time.sleep(0.02)
+        with timings.phase("inner", "mod1"):
+            time.sleep(0.05)
+        with timings.phase("inner", "mod2"):
+            time.sleep(0.01)
+
+    outputs = timings.to_dict()
+    outer = outputs["phases"]["outer"]
+    inner = outputs["phases"]["inner"]
+    assert 0.02 <= outer["wall"] < 0.05
+    assert inner["wall"] >= 0.06
+    assert inner["calls"] == 2
+    assert [module["module"] for module in inner["slowest"]] == ["mod1"]
+    assert outputs["wall"] >= outer["wall"] + inner["wall"]
+
+
+def test_move_timings():
+    project = get_temp_project()
+    project.create_module(
+        "mod1",
+        code(
+            """
+        def test():
+            return 1
+    """
+        ),
+    )
+    project.create_module("mod2", "")
+    project.create_module("mod3", "from mod1 import test\n\nx = test()\n")
+
+    outputs = move(project, "mod1", 1, 4, "mod2", timings=True)
+
+    assert outputs["success"]
+    phases = outputs["timings"]["phases"]
+    assert {
+        "discovery",
+        "parse",
+        "scopes",
+        "transform",
+        "format",
+        "write",
+    } <= set(phases)
+    assert {module["module"] for module in phases["parse"]["slowest"]} == {
+        "mod1",
+        "mod2",
+        "mod3",
+    }
+    assert project.timings is None
+    assert "timings" not in move(project, "mod2", 1, 4, "mod1")
@@ -0,0 +1,95 @@
+import pytest
+from utils import code, get_temp_project
+
+from pyro import Project
+from pyro.journal import JournalError, apply_reverse_diff, reverse_diff
+from pyro.refactorings import move
+from pyro.refactorings.undo import undo
+
+
+def get_journaled_project() -> Project:
+    project = get_temp_project()
+    return Project(project.root, cache_dir=project.root / ".pyro_cache")
+
+
+def test_reverse_diff():
+    original = "a = 1\nb = 2\nc = 3\n"
+    content = "a = 1\nc = 3\nd = 4\n"
+    operations = reverse_diff(content, original)
+    assert apply_reverse_diff(content, operations) == original
+
+
+def test_undo_move():
+    project = get_journaled_project()
+
+    mod1 = code(
+        """
+        def test():
+            return 1
+
+
+        x = test()
+    """
+    )
+    mod3 = code(
+        """
+        from mod1 import test
+
+        y = test()
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+    project.create_module("mod3", mod3)
+
+    move(project, "mod1", 1, 4, "mod2")
+    assert project.get_module_content("mod2") != ""
+
+    outputs = undo(project)
+    assert outputs["undone"] == ["move mod1:test to mod2"]
+    assert project.get_module_content("mod1") == mod1
+    assert project.get_module_content("mod2") == ""
+    assert project.get_module_content("mod3") == mod3
+
+    assert undo(project)["undone"] == []
+
+
+def test_undo_several_steps():
+    project = get_journaled_project()
+
+    mod1 = code(
+        """
+        def test():
+            return 1
+
+
+        def other():
+            return 2
+    """
+    )
+    project.create_module("mod1", mod1)
+    project.create_module("mod2", "")
+
+    move(project, "mod1", 1, 4, "mod2")
+    move(project, "mod1", 1, 4, "mod2")
+
+    outputs = undo(project, steps=2)
+    assert outputs["undone"] == [
+        "move mod1:other to mod2",
+        "move mod1:test to mod2",
+    ]
+    assert project.get_module_content("mod1") == mod1
+    assert project.get_module_content("mod2") == ""
+
+
+def test_undo_modified_file():
+    project = get_journaled_project()
+
+    project.create_module("mod1", "def test():\n    return 1\n")
+    project.create_module("mod2", "")
+    move(project, "mod1", 1, 4, "mod2")
+
+    project.save_module_content("mod2", "x = 1\n")
+    with pytest.raises(JournalError):
+        undo(project)
+    assert project.get_module_content("mod2") == "x = 1\n"
@@ -0,0 +1,149 @@
+import os
+
+import pytest
+from utils import get_temp_project
+
+from pyro.watcher import (
+    Changes,
+    InotifyBackend,
+    PollingBackend,
+    Watcher,
+    create_backend,
+)
+
+
+def read_all(backend, timeout=2.0) -> Changes:
+    changes = backend.read(timeout)
+    while True:
+        more = backend.read(0.2)
+        if not more:
+            return changes
+        changes.update(more)
+
+
+def make_backend(kind, root):
+    if kind == "polling":
+        return PollingBackend(root, interval=0.01)
+    try:
+        return InotifyBackend(root)
+    except OSError:
+        pytest.skip("inotify is not available")
+
+
+@pytest.mark.parametrize("kind", ["inotify", "polling"])
+def test_backend_changes(kind):
+    project = get_temp_project()
+    project.create_module("pkg.mod1", "x = 1\n")
+    project.create_module("pkg.mod2", "y = 1\n")
+    backend = make_backend(kind, project.root)
+    try:
+        with open(project.get_module_path("pkg.mod1"), "w") as f:
+            f.write("x = 10\n")
+        changes = read_all(backend)
+        assert changes.modified == {"pkg/mod1.py"}
+        assert not changes.directories
+
+        project.get_module_path("pkg.mod2").unlink()
+        project.create_module("pkg.sub.mod3", "z = 1\n")
+        changes = read_all(backend)
+        assert {"pkg", "pkg/sub"} <= changes.directories
+
+        # New directories are watched too.
+        with open(project.get_module_path("pkg.sub.mod3"), "w") as f:
+            f.write("z = 10\n")
+        assert read_all(backend).modified == {"pkg/sub/mod3.py"}
+    finally:
+        backend.close()
+
+
+def test_backend_ignores_excluded_dirs():
+    project = get_temp_project()
+    backend = create_backend(project.root, ignored_dirs={"cache"})
+    try:
+        os.makedirs(project.root / "cache/sub")
+        os.makedirs(project.root / "__pycache__")
+        read_all(backend, timeout=0.5)
+        with open(project.root / "cache/sub/mod.py", "w") as f:
+            f.write("x = 1\n")
+        with open(project.root / "__pycache__/mod.py", "w") as f:
+            f.write("x = 1\n")
+        assert not read_all(backend, timeout=0.5)
+    finally:
+        backend.close()
+
+
+def test_watcher_updates_only_changed_modules():
+    project = get_temp_project()
+    project.create_module("mod1", "def f():\n    pass\n")
+    project.create_module("mod2", "x = 1\n")
+    project.create_module("mod3", "from mod1 import f\n")
+
+    watcher = Watcher(project, debounce=0.05).start()
+    try:
+        assert project.watcher is watcher
+        assert project.get_importers("mod1") == ["mod3"]
+        module = project.get_module("mod3")
+
+        refreshes = []
+        refresh = project.import_graph.refresh
+        project.import_graph.refresh = lambda: refreshes.append(refresh())
+
+        with open(project.get_module_path("mod2"), "w") as f:
+            f.write("from mod1 import f\n")
+        assert watcher.wait(timeout=5)
+        assert project.get_importers("mod1") == ["mod2", "mod3"]
+        assert not len(refreshes)
+        # Unchanged modules stay cached.
+        assert project.get_module("mod3").tree is module.tree
+        assert "mod2" not in project.module_cache
+
+        project.create_module("mod4", "import mod1\n")
+        assert watcher.wait(timeout=5)
+        assert project.get_importers("mod1") == ["mod2", "mod3", "mod4"]
+        assert len(refreshes) == 1
+    finally:
+        watcher.stop()
+    assert project.watcher is None
+
+
+def test_watcher_debounces_bursts():
+    project = get_temp_project()
+    for i in range(20):
+        project.create_module(f"mod{i}", "x = 1\n")
+
+    watcher = Watcher(project, debounce=0.5).start()
+    try:
+        project.get_importers("mod0")
+        for i in range(20):
+            with open(project.get_module_path(f"mod{i}"), "w") as f:
+                f.write("import mod0\n")
+        assert watcher.wait(timeout=5)
+        assert project.get_importers("mod0") == [
+            f"mod{i}" for i in sorted(range(1, 20), key=str)
+        ]
+        assert watcher.batches == 1
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize("kind", ["inotify", "polling"])
+def test_watcher_sees_changes_made_right_before_sync(kind):
+    project = get_temp_project()
+    project.create_module("mod1", "x = 1\n")
+    project.create_module("mod2", "y = 1\n")
+    backend = make_backend(kind, project.root)
+    if kind == "polling":
+        # The changes are made long before the next scan.
+        backend.interval = backend.min_debounce = 60.0
+
+    watcher = Watcher(project, backend=backend, debounce=0.05).start()
+    try:
+        assert project.get_importers("mod1") == []
+        for k in range(20):
+            content = "import mod1\n" if k % 2 == 0 else "y = 1\n"
+            with open(project.get_module_path("mod2"), "w") as f:
+                f.write(content)
+            expected = ["mod2"] if k % 2 == 0 else []
+            assert project.get_importers("mod1") == expected
+    finally:
+        watcher.stop()